@@ -1,22 +1,42 @@
 import asyncio
+import contextlib
 import io
 import re
+import time
+from collections.abc import AsyncIterator, Collection
 
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 import breadcord
 from .api import helpers
 from .api.abc import AbstractAPI, AbstractOAuthAPI, AbstractPlaylistAPI
-from .api.errors import InvalidURLError
-from .api.helpers import track_embed, track_to_query, url_to_file
+from .api.cache import TTLCache
+from .api.errors import (
+    CircuitOpenError,
+    CoverDownloadError,
+    InvalidURLError,
+    PlaylistIncompleteError,
+    TrackLookupError,
+)
+from .api.helpers import playlist_description, track_embed, url_to_file
+from .api.jobs import PlaylistJob, PlaylistSnapshot
+from .api.progress import ConversionProgress
 from .api.platforms import SpotifyAPI
+from .api.storage import PlaylistJobStore
+from .api.tracing import span
 from .api.types import APIInterface
 from .api.universals import UniversalTrack
+from .api.workqueue import BoundedWorkQueue
+
+URL_PATTERN = re.compile(r"<?(?:https:|http:)\S+>?")
 
 
 class PlatformConverter(helpers.PlatformAPICog):
+    # How many recently auto converted tracks are remembered across all channels
+    MAX_RECENT_AUTO_CONVERSIONS = 4096
+
     def __init__(self, module_id: str):
         super().__init__(module_id)
 
@@ -26,6 +46,28 @@ class PlatformConverter(helpers.PlatformAPICog):
         )
         self.bot.tree.add_command(self.ctx_menu)
 
+        self.auto_convert_queue: BoundedWorkQueue[discord.Message] = BoundedWorkQueue(
+            self.auto_convert,
+            max_size=self.settings.auto_convert_queue_size.value,
+            workers=self.settings.auto_convert_workers.value,
+            overflow=self.settings.auto_convert_overflow.value,
+            logger=self.logger,
+        )
+        # Maps (channel id, source platform, source track id) to the jump url of the reply that converted it
+        # The value is None while the conversion is still running
+        dedup_window = self.settings.auto_convert_dedup_window.value
+        self.recent_auto_conversions: TTLCache[tuple[int, str, str], str | None] = TTLCache(
+            max_size=self.MAX_RECENT_AUTO_CONVERSIONS if dedup_window > 0 else 0,
+            ttl=dedup_window,
+        )
+
+        self.job_store = PlaylistJobStore(self.module.storage_path / "playlist_jobs.sqlite")
+        # Jobs that are queued or running in this process, by id
+        self.playlist_jobs: dict[str, PlaylistJob] = {}
+        self.playlist_job_tasks: dict[str, asyncio.Task] = {}
+        # Limits how many jobs may run at once in each guild
+        self.playlist_job_semaphores: dict[int | None, asyncio.Semaphore] = {}
+
     # noinspection PyUnusedLocal
     async def platform_autocomplete(
         self,
@@ -61,59 +103,133 @@ class PlatformConverter(helpers.PlatformAPICog):
         if url.startswith("<") and url.endswith(">"):
             url = url[1:-1]
 
-        from_platform = self.api_interfaces.get(from_platform.lower())
-        to_platform = self.api_interfaces.get(to_platform.lower())
-        if not all((from_platform, to_platform)):
+        from_platform, to_platform = from_platform.lower(), to_platform.lower()
+        if not all(platform in self.api_interfaces for platform in (from_platform, to_platform)):
             await ctx.reply("Unknown platform")
             return
 
-        try:
-            track_id = from_platform.get_track_id(url)
-        except InvalidURLError:
-            await ctx.reply("Invalid url")
-            return
-        query = track_to_query(await from_platform.track_from_id(track_id))
-
-        tracks = await to_platform.search_tracks(query)
-        if not tracks:
-            await ctx.reply("No results found")
-            return
-        await ctx.reply(tracks[0].url)
+        async with self.traced("track_convert", url=url, from_platform=from_platform, to_platform=to_platform):
+            try:
+                with span("resolve"):
+                    track_id = self.api_interfaces[from_platform].get_track_id(url)
+            except InvalidURLError:
+                await ctx.reply("Invalid url")
+                return
+
+            converted_url = await self.convert_track(from_platform, to_platform, track_id)
+            with span("reply"):
+                await ctx.reply(converted_url or "No results found")
+
+    async def cog_load(self) -> None:
+        await super().cog_load()
+        self.auto_convert_queue.start()
+
+        await self.job_store.open()
+        for job in await self.job_store.active():
+            self.logger.info(f"Resuming playlist job {job.id} from track {job.start_index + len(job.results)}")
+            self.start_playlist_job(job)
+        self.prune_playlist_jobs.start()
+
+    async def cog_unload(self) -> None:
+        await self.auto_convert_queue.stop()
+        self.prune_playlist_jobs.cancel()
+        # Saves the progress of running jobs, before the job store is closed
+        for task in self.playlist_job_tasks.values():
+            task.cancel()
+        await asyncio.gather(*self.playlist_job_tasks.values(), return_exceptions=True)
+        await self.job_store.close()
+        await super().cog_unload()
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
-        if not self.settings.disliked_platforms.value:
+        if message.author.bot or not self.settings.search_messages.value:
+            return
+        if not (disliked_platforms := self.settings.disliked_platforms.value):
             return
-        if urls := await self.convert_message_urls(message):
-            await message.reply(urls, mention_author=False)
+        # Plain substring checks are far cheaper than the url regex, and rule out nearly every message
+        if "http" not in message.content or not any(
+            host in message.content for host in self.url_router.hosts_for(disliked_platforms)
+        ):
+            return
+        if not self.auto_convert_queue.put(message):
+            self.logger.debug(f"Auto conversion queue is full, skipped message {message.id}")
+
+    async def auto_convert(self, message: discord.Message) -> None:
+        async with self.traced("auto_convert", message_id=message.id, channel_id=message.channel.id):
+            preferred_platform = self.settings.preferred_platform.value
+            link_duplicates = self.settings.auto_convert_duplicate_mode.value == "link"
+
+            to_convert: list[tuple[int, str, str]] = []
+            earlier_replies: list[str] = []
+            with span("resolve"):
+                routes = self.message_track_routes(message, platforms=self.settings.disliked_platforms.value)
+            for platform_name, track_id in dict.fromkeys(routes):
+                key = (message.channel.id, platform_name, track_id)
+                if key in self.recent_auto_conversions:
+                    if link_duplicates and (reply_url := self.recent_auto_conversions.get(key)):
+                        earlier_replies.append(reply_url)
+                    continue
+                # Claimed before awaiting anything, so that the same track posted again meanwhile is not converted twice
+                self.recent_auto_conversions.set(key, None)
+                to_convert.append(key)
+
+            try:
+                converted_urls = await asyncio.gather(*(
+                    self.convert_track(platform_name, preferred_platform, track_id)
+                    for _, platform_name, track_id in to_convert
+                ))
+            except BaseException:
+                for key in to_convert:
+                    self.recent_auto_conversions.pop(key)
+                raise
+
+            content = " ".join(filter(None, converted_urls))
+            if earlier_replies:
+                content += "\n" + "\n".join(f"Already converted: {url}" for url in dict.fromkeys(earlier_replies))
+            if not (content := content.strip()):
+                return
+            with span("reply"):
+                reply = await message.reply(content, mention_author=False)
+            for key in to_convert:
+                self.recent_auto_conversions.set(key, reply.jump_url)
 
     async def url_convert_ctx_menu(self, interaction: discord.Interaction, message: discord.Message) -> None:
         await interaction.response.defer(thinking=True, ephemeral=True)
-        await interaction.followup.send(await self.convert_message_urls(message) or "Nothing to convert")
-
-    async def convert_message_urls(self, message: discord.Message) -> str | None:
-        preferred_platform_interface = self.api_interfaces.get(self.settings.preferred_platform.value)
-        if preferred_platform_interface is None:
-            raise ValueError("No valid preferred platform is set")
+        async with self.traced("convert_message_urls", message_id=message.id, channel_id=message.channel.id):
+            converted_urls = await self.convert_message_urls(message)
+            with span("reply"):
+                await interaction.followup.send(converted_urls or "Nothing to convert")
 
-        if not (urls := re.findall(r"<?(?:https:|http:)\S+>?", message.content)):
-            return
+    def message_track_routes(
+        self,
+        message: discord.Message,
+        *,
+        platforms: Collection[str] | None = None,
+    ) -> list[tuple[str, str]]:
+        """The (platform, track id) of every track url in a message not on the preferred platform.
 
-        async def convert_url(url: str) -> str:
-            for api_interface in self.api_interfaces.values():
-                if api_interface == preferred_platform_interface:
-                    continue
-                try:
-                    track_id = api_interface.get_track_id(url)
-                except InvalidURLError:
-                    continue
+        Only urls from ``platforms`` are included if given.
+        """
+        preferred_platform = self.settings.preferred_platform.value
+        if preferred_platform not in self.api_interfaces:
+            raise ValueError("No valid preferred platform is set")
 
-                query = track_to_query(await api_interface.track_from_id(track_id))
-                tracks = await preferred_platform_interface.search_tracks(query)
-                return tracks[0].url
+        routes = []
+        for url in URL_PATTERN.findall(message.content):
+            if (route := self.url_router.resolve(url, skip=(preferred_platform,))) is None:
+                continue
+            platform_name, kind, track_id = route
+            if kind == "track" and (platforms is None or platform_name in platforms):
+                routes.append((platform_name, track_id))
+        return routes
 
-        converted_urls = tuple(filter(bool, await asyncio.gather(*map(convert_url, urls))))
-        return " ".join(converted_urls) or None
+    async def convert_message_urls(self, message: discord.Message) -> str | None:
+        preferred_platform = self.settings.preferred_platform.value
+        converted_urls = await asyncio.gather(*(
+            self.convert_track(platform_name, preferred_platform, track_id)
+            for platform_name, track_id in self.message_track_routes(message)
+        ))
+        return " ".join(filter(None, converted_urls)) or None
 
     # noinspection PyIncorrectDocstring
     @commands.hybrid_command()
@@ -148,15 +264,35 @@ class PlatformConverter(helpers.PlatformAPICog):
 
         await ctx.defer()
         results = await platform.search_tracks(query)
+        if not results:
+            await ctx.reply("No results found")
+            return
+
         if compact_embeds:
+            results = results[:min(10, max(1, count))]
+
+            async def fetch_cover(track: UniversalTrack) -> io.BytesIO | None:
+                if not track.cover_url:
+                    return None
+                try:
+                    return await url_to_file(
+                        track.cover_url,
+                        session=self.session,
+                        cover_cache=self.cover_cache,
+                        metrics=self.metrics,
+                    )
+                except CoverDownloadError:
+                    return None
+
             embeds = []
             files = []
-            for i, result in enumerate(results[:min(10, max(1, count))]):
-                result: UniversalTrack
-                files.append(discord.File(
-                    await url_to_file(result.cover_url, session=self.session),
-                    filename=f"{i}.png"
-                ))
+            # All covers are downloaded at once, so this only takes as long as the slowest one
+            for i, (result, cover) in enumerate(zip(results, await asyncio.gather(*map(fetch_cover, results)))):
+                if cover is None:
+                    # Let discord try to fetch it instead
+                    embeds.append(track_embed(result, random_colour=True))
+                    continue
+                files.append(discord.File(cover, filename=f"{i}.png"))
                 embeds.append(track_embed(result, random_colour=True, cover_url=f"attachment://{i}.png"))
             await ctx.reply(embeds=embeds, files=files)
         else:
@@ -203,36 +339,34 @@ class PlatformConverter(helpers.PlatformAPICog):
         except InvalidURLError:
             await ctx.reply("Invalid playlist url")
             return
-        playlist = await platform.get_playlist_content(playlist_id)
+        # One more than is shown, to know whether to say that there are more
+        playlist = await platform.get_playlist_content(playlist_id, max_tracks=max(0, max_tracks) + 1)
         if playlist is None:
             await ctx.reply("Could not find that playlist. Ensure that it exists and is public.")
             return
 
-        description = discord.utils.escape_markdown(playlist.description.strip()) if playlist.description else ""
-        description += "\n\n**Tracks**"
-        for i, track in enumerate(playlist.tracks):
-            title = discord.utils.escape_markdown(track.title)
-            artists = ", ".join(map(discord.utils.escape_markdown, track.artist_names))
-
-            fallback_text = f"\n\nAnd {len(playlist.tracks) - i} more..." if i != len(playlist.tracks) - 1 else ""
-            addition = f"{i + 1}. [{title}]({track.url}) - {artists}"
-            if len(description) + len(addition) + len(fallback_text) >= 4096 or i >= max_tracks:
-                description += fallback_text
-                break
-            description += f"\n{addition}"
-
-        cover = discord.File(
-            await url_to_file(playlist.cover_url, session=self.session),
-            filename="cover.png"
-        )
+        # Without a cover to download, or if downloading it fails, discord is left to fetch it instead
+        cover, thumbnail_url = discord.utils.MISSING, playlist.cover_url
+        if playlist.cover_url:
+            with contextlib.suppress(CoverDownloadError):
+                cover = discord.File(
+                    await url_to_file(
+                        playlist.cover_url,
+                        session=self.session,
+                        cover_cache=self.cover_cache,
+                        metrics=self.metrics,
+                    ),
+                    filename="cover.png"
+                )
+                thumbnail_url = "attachment://cover.png"
         await ctx.reply(
             embed=discord.Embed(
                 title=playlist.name,
-                description=description,
+                description=playlist_description(playlist, max_tracks=max_tracks),
                 url=playlist.url,
                 colour=discord.Colour.random(seed=playlist.url),
             ).set_thumbnail(
-                url="attachment://cover.png"
+                url=thumbnail_url
             ).set_footer(
                 text=f"By {', '.join(playlist.owner_names)}" if playlist.owner_names else None,
             ),
@@ -270,69 +404,335 @@ class PlatformConverter(helpers.PlatformAPICog):
         if url.startswith("<") and url.endswith(">"):
             url = url[1:-1]
 
-        from_platform = self.api_interfaces.get(from_platform.lower())
-        to_platform = self.api_interfaces.get(to_platform.lower())
-        if not all((isinstance(from_platform, AbstractPlaylistAPI), isinstance(to_platform, AbstractAPI))):
+        from_platform, to_platform = from_platform.lower(), to_platform.lower()
+        from_interface = self.api_interfaces.get(from_platform)
+        if not all((
+            isinstance(from_interface, AbstractPlaylistAPI),
+            isinstance(self.api_interfaces.get(to_platform), AbstractAPI),
+        )):
             await ctx.reply("Unknown platform")
             return
 
-        playlist = await from_platform.get_playlist_content(from_platform.get_playlist_id(url))
-        if not playlist or not playlist.tracks:
-            await ctx.reply("Could not find that playlist. Ensure that it exists and is public.")
+        try:
+            playlist_id = from_interface.get_playlist_id(url)
+        except InvalidURLError:
+            await ctx.reply("Invalid playlist url")
             return
 
-        run_by_owner = await self.bot.is_owner(ctx.author)
-        if not run_by_owner and len(playlist.tracks) > self.settings.max_convert_playlist_size.value:
-            await ctx.reply(
-                f"This playlist is too big to convert in a reasonable amount of time, "
-                f"only the first {self.settings.max_convert_playlist_size.value} tracks will be converted.\n"
-                f"This may take a while..."
-            )
+        job = PlaylistJob(
+            guild_id=ctx.guild.id if ctx.guild else None,
+            channel_id=ctx.channel.id,
+            user_id=ctx.author.id,
+            from_platform=from_platform,
+            to_platform=to_platform,
+            playlist_id=playlist_id,
+            url=url,
+            start_index=max(1, start_index),
+            max_tracks=None if await self.bot.is_owner(ctx.author) else self.settings.max_convert_playlist_size.value,
+        )
+        await self.job_store.save(job)
+        self.start_playlist_job(job)
+        await ctx.reply(
+            f"Queued converting the playlist as job `{job.id}`, its progress will be posted in this channel.\n"
+            f"It carries on if the bot restarts, use `playlist_job_cancel {job.id}` to stop it."
+        )
+
+    def start_playlist_job(self, job: PlaylistJob) -> None:
+        self.playlist_jobs[job.id] = job
+        task = asyncio.create_task(self.run_playlist_job(job))
+        self.playlist_job_tasks[job.id] = task
+
+        def forget(_) -> None:
+            self.playlist_jobs.pop(job.id, None)
+            self.playlist_job_tasks.pop(job.id, None)
+
+        task.add_done_callback(forget)
+
+    async def run_playlist_job(self, job: PlaylistJob) -> None:
+        """Runs a job once its guild has a free job slot, saving its progress as it goes."""
+        semaphore = self.playlist_job_semaphores.setdefault(
+            job.guild_id,
+            asyncio.Semaphore(self.settings.max_playlist_jobs_per_guild.value),
+        )
+        try:
+            async with semaphore:
+                await self._run_playlist_job(job)
+        except asyncio.CancelledError:
+            # Jobs cancelled because the cog is unloading stay active, so that they resume on the next load
+            if job.status == "cancelled":
+                await self.job_store.save(job)
+            raise
+        except Exception as error:
+            if job.status == "finished":
+                # Only posting the results failed, the job itself is done and saved
+                self.logger.exception(f"Could not post the results of playlist job {job.id}")
+                return
+            self.logger.exception(f"Playlist job {job.id} failed")
+            job.status, job.error = "failed", repr(error)
+            await self.job_store.save(job)
+
+    async def _run_playlist_job(self, job: PlaylistJob) -> None:
+        await self.bot.wait_until_ready()
+        channel = self.bot.get_channel(job.channel_id) or await self.bot.fetch_channel(job.channel_id)
+        from_interface = self.api_interfaces[job.from_platform]
+
+        # Only whole playlists are snapshotted, a conversion starting part way through can't stand in for one
+        keep_snapshot = job.start_index == 1 and self.settings.playlist_snapshot_retention.value > 0
+        snapshot = version = None
+        if keep_snapshot:
+            snapshot = await self.job_store.get_snapshot(job.from_platform, job.playlist_id, job.to_platform)
+            # Converted urls are only trusted for as long as the track mapping store trusts them
+            if snapshot is not None and snapshot.updated_at <= time.time() - self.settings.track_mapping_ttl.value:
+                snapshot = None
+            try:
+                version = await from_interface.get_playlist_version(job.playlist_id)
+            except Exception as error:
+                # Only an optimisation, the playlist just gets fetched again without it
+                self.logger.warning(f"Could not get the version of playlist {job.playlist_id}: {error!r}")
+        unchanged = (
+            snapshot is not None
+            and version is not None
+            and snapshot.version == version
+            and (not snapshot.truncated or (job.max_tracks is not None and job.max_tracks <= len(snapshot.tracks)))
+        )
+
+        # Tracks that were queued but not finished before a restart get fetched again
+        del job.track_urls[len(job.results):]
+
+        async def tracks_to_convert() -> AsyncIterator[UniversalTrack]:
+            # Tracks converted before a restart are skipped, the playlist is assumed to not have changed since
+            first_index = job.start_index - 1 + len(job.results)
+            async with contextlib.aclosing(from_interface.iter_playlist_tracks(job.playlist_id)) as playlist_tracks:
+                index = 0
+                async for track in playlist_tracks:
+                    if job.max_tracks is not None and index >= job.max_tracks:
+                        job.truncated = True
+                        return
+                    if index >= first_index:
+                        job.track_urls.append(track.url)
+                        yield track
+                    index += 1
+
+        job.status = "running"
+        await self.job_store.save(job)
+        progress = ConversionProgress(
+            title=f"Converting tracks (job `{job.id}`)",
+            edit_interval=self.settings.progress_edit_interval.value,
+        )
+        progress.results = dict(enumerate(job.results))
+        progress.queued = len(job.results)
+        progress.message = await channel.send(progress.render())
+
+        if unchanged:
+            # Nothing has to be fetched or converted, the last conversion still holds
+            reused_tracks = snapshot.tracks[:job.max_tracks]
+            job.truncated = snapshot.truncated or len(reused_tracks) < len(snapshot.tracks)
+            job.track_urls = [track_url for track_url, _ in reused_tracks]
+            converted_track_urls = [converted_url for _, converted_url in reused_tracks]
+            progress.results = dict(enumerate(converted_track_urls))
         else:
-            await ctx.reply("Converting tracks. This may take a while...")
-
-        if not run_by_owner:
-            playlist.tracks = playlist.tracks[:self.settings.max_convert_playlist_size.value]
-        playlist.tracks = playlist.tracks[start_index - 1:]
-
-        converted_track_urls = []
-        for track in playlist.tracks:
-            query = track_to_query(track)
-            if converted_track := await to_platform.search_tracks(query):
-                converted_track_urls.append(converted_track[0].url)
-            else:
-                converted_track_urls.append("Could not be found")
-            # Give the API some time to breathe
-            await asyncio.sleep(0.5)
-
-        if not converted_track_urls or all(url == "Could not be found" for url in converted_track_urls):
-            await ctx.reply("No results found")
-            return
+            converted_track_urls = await self._convert_playlist_job_tracks(
+                job,
+                tracks_to_convert(),
+                progress=progress,
+                # Tracks that were already in the playlist last time keep what they were converted to
+                previous_results=dict(snapshot.tracks) if snapshot is not None else None,
+            )
 
-        def supress_embed(to_supress: str, /) -> str:
-            return f"<{to_supress}>"
+        job.results = converted_track_urls
+        job.status = "finished"
+        await self.job_store.save(job)
+        # An unchanged snapshot is left as it was, since this job might have only used part of it
+        # Jobs resumed from before track urls were recorded can't be matched up with their results
+        saves_snapshot = (
+            keep_snapshot
+            and not unchanged
+            and converted_track_urls
+            and len(job.track_urls) == len(converted_track_urls)
+        )
+        if saves_snapshot:
+            await self.job_store.save_snapshot(
+                job.from_platform,
+                job.playlist_id,
+                job.to_platform,
+                PlaylistSnapshot(
+                    version=version,
+                    tracks=list(zip(job.track_urls, converted_track_urls)),
+                    truncated=job.truncated,
+                ),
+            )
 
-        to_send = (f"# Finished converting tracks\n"
-                   f"Converted from: <{url}>\n\n")
-        for i, url in enumerate(map(supress_embed, converted_track_urls), start=1):
-            if len(to_send) + len(url) >= 2000:
-                await ctx.channel.send(to_send)
-                to_send = ""
-            to_send += f"{i}. {url}\n"
+        if not converted_track_urls:
+            await progress.finish("Could not find that playlist. Ensure that it exists and is public.")
+            return
+        if not any(converted_track_urls):
+            await progress.finish("No results found")
+            return
+
+        chunks = [
+            f"# Finished converting tracks\n"
+            f"Converted from: <{job.url}>\n"
+            f"{progress.completed} tracks in {progress.elapsed:.1f}s\n\n"
+        ]
+        if unchanged:
+            chunks[0] += "The playlist has not changed since it was last converted, so those results were reused.\n\n"
+        if job.truncated:
+            chunks[0] += (
+                f"This playlist is too big to convert in a reasonable amount of time, "
+                f"only the first {job.max_tracks} tracks were converted.\n\n"
+            )
+        for i, converted_url in enumerate(converted_track_urls, start=1):
+            line = f"{i}. {f'<{converted_url}>' if converted_url else 'Could not be found'}\n"
+            if len(chunks[-1]) + len(line) >= 2000:
+                chunks.append("")
+            chunks[-1] += line
 
         # A file listing all the converted urls
         file = discord.File(
-            fp=io.BytesIO("\n".join(converted_track_urls).encode("utf-8")),
+            fp=io.BytesIO("\n".join(
+                converted_url or "Could not be found" for converted_url in converted_track_urls
+            ).encode("utf-8")),
             filename="converted_tracks.txt"
         )
+        await progress.finish(chunks[0], file=file)
+        for chunk in chunks[1:]:
+            await channel.send(chunk)
+
+    async def _convert_playlist_job_tracks(
+        self,
+        job: PlaylistJob,
+        tracks: AsyncIterator[UniversalTrack],
+        *,
+        progress: ConversionProgress,
+        previous_results: dict[str, str | None] | None,
+    ) -> list[str | None]:
+        """Converts the tracks a job has left, checkpointing as it goes and reporting it if the job stops early."""
+        checkpoints = asyncio.create_task(self._checkpoint_playlist_job(job, progress))
+        try:
+            return job.results + await self.convert_tracks(
+                job.from_platform,
+                job.to_platform,
+                tracks,
+                progress=progress,
+                first_index=len(job.results),
+                previous_results=previous_results,
+            )
+        except asyncio.CancelledError:
+            job.results = self._finished_job_results(progress)
+            await self.job_store.save(job)
+            if job.status == "cancelled":
+                with contextlib.suppress(discord.HTTPException):
+                    await progress.finish(f"Cancelled job `{job.id}` after {len(job.results)} tracks")
+            raise
+        except Exception as error:
+            job.results = self._finished_job_results(progress)
+            with contextlib.suppress(discord.HTTPException):
+                await progress.finish(f"Job `{job.id}` failed after {len(job.results)} tracks: {error}")
+            raise
+        finally:
+            checkpoints.cancel()
+
+    @staticmethod
+    def _finished_job_results(progress: ConversionProgress) -> list[str | None]:
+        """The converted urls from the start of the playlist up to the first track that is not done yet."""
+        results = []
+        while len(results) in progress.results:
+            results.append(progress.results[len(results)])
+        return results
+
+    async def _checkpoint_playlist_job(self, job: PlaylistJob, progress: ConversionProgress) -> None:
+        while True:
+            await asyncio.sleep(self.settings.playlist_job_checkpoint_interval.value)
+            job.results = self._finished_job_results(progress)
+            await self.job_store.save(job)
+
+    @tasks.loop(hours=6)
+    async def prune_playlist_jobs(self):
+        if removed := await self.job_store.remove_finished(self.settings.playlist_job_retention.value):
+            self.logger.debug(f"Removed {removed} old playlist jobs")
+        if retention := self.settings.playlist_snapshot_retention.value:
+            if removed := await self.job_store.remove_snapshots(retention):
+                self.logger.debug(f"Removed {removed} old playlist snapshots")
 
-        if to_send:
-            await ctx.channel.send(to_send, file=file)
+    # noinspection PyIncorrectDocstring
+    @commands.hybrid_command()
+    async def playlist_job_status(self, ctx: commands.Context, job_id: str | None = None):
+        """Shows how far background playlist conversions have gotten
+
+        Parameters
+        -----------
+        job_id: str
+            The job to show, leave this out to list the unfinished jobs in this server
+        """
+        if job_id is not None:
+            job = self.playlist_jobs.get(job_id) or await self.job_store.get(job_id)
+            # Jobs from other servers are none of your business, unless you started them
+            if job is not None and not (
+                (ctx.guild is not None and job.guild_id == ctx.guild.id)
+                or job.user_id == ctx.author.id
+                or await self.bot.is_owner(ctx.author)
+            ):
+                job = None
+            await ctx.reply(job.describe() if job else "Unknown job", ephemeral=True)
+            return
+
+        guild_id = ctx.guild.id if ctx.guild else None
+        jobs = [
+            job for job in self.playlist_jobs.values()
+            if job.guild_id == guild_id and (guild_id is not None or job.user_id == ctx.author.id)
+        ]
+        await ctx.reply("\n".join(job.describe() for job in jobs) or "No playlists are being converted", ephemeral=True)
+
+    # noinspection PyIncorrectDocstring
+    @commands.hybrid_command()
+    async def playlist_job_cancel(self, ctx: commands.Context, job_id: str):
+        """Stops a background playlist conversion
+
+        Parameters
+        -----------
+        job_id: str
+            The job to stop
+        """
+        # Jobs that are done converting and only posting their results can't be cancelled anymore
+        if (job := self.playlist_jobs.get(job_id)) is None or not job.active:
+            await ctx.reply("No unfinished job has that id", ephemeral=True)
+            return
+        if job.user_id != ctx.author.id and not await self.bot.is_owner(ctx.author):
+            await ctx.reply("Only the person who started a job can cancel it", ephemeral=True)
+            return
+
+        job.status = "cancelled"
+        self.playlist_job_tasks[job_id].cancel()
+        await ctx.reply(f"Cancelled job `{job_id}`", ephemeral=True)
+
+    @commands.hybrid_command()
+    @commands.is_owner()
+    async def converter_stats(self, ctx: commands.Context):
+        """Show how many calls each platform got, how long they took and how well the caches are doing"""
+        summary = self.metrics.summary()
+        if len(summary) + 8 <= 2000:
+            await ctx.reply(f"```\n{summary}\n```", ephemeral=True)
+        else:
+            await ctx.reply(
+                file=discord.File(io.BytesIO(summary.encode("utf-8")), filename="converter_stats.txt"),
+                ephemeral=True,
+            )
 
     async def cog_command_error(self, ctx: commands.Context, error: Exception) -> None:
         if isinstance(error, commands.MissingRequiredArgument):
             await ctx.reply(str(error), ephemeral=True)
             return
+        # Slash command errors arrive as a HybridCommandError wrapping an app_commands.CommandInvokeError
+        wrappers = (commands.CommandInvokeError, commands.HybridCommandError, app_commands.CommandInvokeError)
+        original = error
+        while isinstance(original, wrappers):
+            original = original.original
+        if isinstance(original, CircuitOpenError):
+            await ctx.reply(f"{original}, try again in {original.retry_after:.0f}s", ephemeral=True)
+            return
+        if isinstance(original, (PlaylistIncompleteError, TrackLookupError)):
+            await ctx.reply(f"{original}, try again later", ephemeral=True)
+            return
         raise
 
 
@@ -1 +1,23 @@
-from . import platforms, abc, errors, helpers, types, universals
+from . import (
+    platforms,
+    abc,
+    batching,
+    cache,
+    circuit,
+    coalescing,
+    covers,
+    errors,
+    helpers,
+    instances,
+    jobs,
+    metrics,
+    progress,
+    ratelimit,
+    routing,
+    storage,
+    tracing,
+    transport,
+    types,
+    universals,
+    workqueue,
+)
@@ -1,9 +1,14 @@
+import asyncio
+import contextlib
 from abc import abstractmethod, ABC
+from collections.abc import AsyncIterator, Collection, Sequence
 from datetime import datetime, timedelta
 
 import aiohttp
 
-from .errors import InvalidURLError
+from .circuit import CircuitBreaker
+from .errors import InvalidURLError, RateLimitedError
+from .ratelimit import TokenBucket, backoff_delay, parse_retry_after
 from .universals import UniversalTrack, UniversalPlaylist
 
 __all__ = [
@@ -14,8 +19,99 @@ __all__ = [
 
 
 class AbstractAPI(ABC):
-    def __init__(self, *, session: aiohttp.ClientSession):
+    # Statuses that mean the request may succeed if it is retried a bit later
+    RETRY_STATUSES = frozenset({429, 502, 503, 504})
+    # The hostnames this platform's track and playlist urls can be on, used for routing urls to the right platform
+    url_hosts: tuple[str, ...] = ()
+
+    def __init__(
+        self,
+        *,
+        session: aiohttp.ClientSession,
+        rate_limiter: TokenBucket | None = None,
+        max_retries: int = 3,
+        max_retry_after: float = 60,
+        timeout: aiohttp.ClientTimeout | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+    ):
         self.session = session
+        self.rate_limiter = rate_limiter or TokenBucket(rate=0, capacity=0)
+        self.max_retries = max_retries
+        # Servers asking to wait longer than this are given up on instead of waited for, in seconds
+        self.max_retry_after = max_retry_after
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(
+            name=type(self).__name__,
+            failure_threshold=5,
+            reset_timeout=30,
+        )
+        # Falls back to the session's timeout when not set
+        self.timeout = timeout
+        # Used by the coalesce decorator to share identical calls that are in progress
+        self._in_flight: dict[tuple, asyncio.Future] = {}
+
+    @contextlib.asynccontextmanager
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        retry_statuses: Collection[int] | None = None,
+        **kwargs,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Makes a rate limited request, retrying with backoff when the platform asks us to slow down.
+
+        Takes the same arguments as :meth:`aiohttp.ClientSession.request`.
+        ``retry_statuses`` replaces :attr:`RETRY_STATUSES` for this request, pass an empty one to never retry.
+        Raises :class:`CircuitOpenError` without sending anything if the platform has been failing.
+        """
+        if retry_statuses is None:
+            retry_statuses = self.RETRY_STATUSES
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+        self.circuit_breaker.before_request()
+        outcome_recorded = False
+        try:
+            attempt = 0
+            while True:
+                await self.rate_limiter.acquire()
+                try:
+                    response = await self.session.request(method, url, **kwargs)
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    self.circuit_breaker.record_failure()
+                    outcome_recorded = True
+                    raise
+                if response.status not in retry_statuses:
+                    break
+
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                waits_too_long = retry_after is not None and retry_after > self.max_retry_after
+                delay = backoff_delay(attempt) if retry_after is None else min(retry_after, self.max_retry_after)
+                if response.status == 429:
+                    # Everyone sharing this platform should back off, not just this request
+                    self.rate_limiter.block_for(delay)
+                if attempt >= self.max_retries or waits_too_long:
+                    if response.status == 429:
+                        response.release()
+                        # Being rate limited still means the platform is up
+                        self.circuit_breaker.record_success()
+                        outcome_recorded = True
+                        raise RateLimitedError(f"Rate limited by {url}", retry_after=retry_after)
+                    break
+                response.release()
+                await asyncio.sleep(delay)
+                attempt += 1
+
+            if response.status >= 500:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+            outcome_recorded = True
+        finally:
+            if not outcome_recorded:
+                self.circuit_breaker.release()
+
+        async with response:
+            yield response
 
     def is_valid_track_url(self, track_url: str, /) -> bool:
         try:
@@ -31,30 +127,120 @@ class AbstractAPI(ABC):
 
     @abstractmethod
     async def track_from_id(self, track_id: str) -> UniversalTrack | None:
+        """Returns the track with the id, or None if it does not exist.
+
+        Raises if the lookup itself failed, so that a failure is never mistaken for the track not existing.
+        """
         raise NotImplementedError
 
+    async def tracks_from_ids(self, track_ids: Sequence[str]) -> list[UniversalTrack | None]:
+        """Looks up several tracks at once, returning them in the same order as the ids.
+
+        Platforms with a bulk lookup endpoint should override this, by default the ids are looked up concurrently.
+        """
+        return list(await asyncio.gather(*map(self.track_from_id, track_ids)))
+
     @abstractmethod
     async def search_tracks(self, query: str) -> list[UniversalTrack] | None:
+        """Returns the tracks matching a query, best match first.
+
+        An empty list means the search worked but found nothing, None means the search itself failed.
+        """
         raise NotImplementedError
 
 
 class AbstractOAuthAPI(AbstractAPI, ABC):
-    def __init__(self, *, client_id: str, client_secret: str, session: aiohttp.ClientSession):
-        super().__init__(session=session)
+    # How long before it expires a token is refreshed
+    TOKEN_LENIENCY = timedelta(minutes=15)
+
+    def __init__(self, *, client_id: str, client_secret: str, **kwargs):
+        super().__init__(**kwargs)
         self.client_id = client_id
         self.client_secret = client_secret
         self._token: str | None = None
         self._token_expires_at: datetime | None = None
+        self._token_lock = asyncio.Lock()
+        self._token_refresh_task: asyncio.Task | None = None
 
     @property
     def should_update_token(self) -> bool:
-        leniency = timedelta(minutes=15)
-        return self._token_expires_at is None or self._token_expires_at < datetime.now() + leniency
+        return self._token_expires_at is None or self._token_expires_at < datetime.now() + self.TOKEN_LENIENCY
 
     @abstractmethod
-    async def refresh_access_token(self):
+    async def fetch_access_token(self) -> tuple[str, float]:
+        """Requests a new access token, returning it and how many seconds it is valid for."""
         raise NotImplementedError
 
+    async def refresh_access_token(self, *, stale_token: str | None = None) -> None:
+        """Gets a new access token if the current one is about to expire, or is ``stale_token``.
+
+        Concurrent callers wait for and share a single refresh.
+        """
+        async with self._token_lock:
+            if stale_token is not None:
+                if self._token != stale_token:
+                    # Someone else already replaced it while we were waiting for the lock
+                    return
+            elif not self.should_update_token:
+                return
+
+            token, expires_in = await self.fetch_access_token()
+            self._token = token
+            self._token_expires_at = datetime.now() + timedelta(seconds=expires_in)
+
+        self._schedule_token_refresh()
+
+    def _schedule_token_refresh(self) -> None:
+        """Refreshes the token in the background shortly before it expires, so requests don't have to wait for it."""
+        self.stop_token_refresh()
+        delay = (self._token_expires_at - self.TOKEN_LENIENCY - datetime.now()).total_seconds()
+
+        async def refresh_later() -> None:
+            await asyncio.sleep(max(0.0, delay))
+            # If this fails the next request will try again
+            with contextlib.suppress(Exception):
+                await self.refresh_access_token()
+
+        self._token_refresh_task = asyncio.create_task(refresh_later())
+
+    def stop_token_refresh(self) -> None:
+        if self._token_refresh_task is not None and self._token_refresh_task is not asyncio.current_task():
+            self._token_refresh_task.cancel()
+        self._token_refresh_task = None
+
+    @contextlib.asynccontextmanager
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        authorize: bool = True,
+        **kwargs,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Like :meth:`AbstractAPI.request`, but sends the access token, getting a new one when needed.
+
+        If the platform rejects the token anyway, it is refreshed and the request is retried once.
+        """
+        if not authorize:
+            async with super().request(method, url, **kwargs) as response:
+                yield response
+            return
+
+        headers = kwargs.pop("headers", {})
+        token = None
+        for attempt in range(2):
+            await self.refresh_access_token(stale_token=token)
+            token = self._token
+            async with super().request(
+                method,
+                url,
+                headers={**headers, "Authorization": f"Bearer {token}"},
+                **kwargs,
+            ) as response:
+                if response.status != 401 or attempt:
+                    yield response
+                    return
+
 
 class AbstractPlaylistAPI(ABC):
     async def is_valid_playlist_url(self, playlist_url: str, /) -> bool:
@@ -70,5 +256,43 @@ class AbstractPlaylistAPI(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    async def get_playlist_content(self, playlist_id: str) -> UniversalPlaylist | None:
+    async def get_playlist_content(
+        self,
+        playlist_id: str,
+        *,
+        max_tracks: int | None = None,
+    ) -> UniversalPlaylist | None:
+        """Fetches a playlist along with its tracks, or only the first ``max_tracks`` of them."""
         raise NotImplementedError
+
+    @staticmethod
+    async def _collect_tracks(
+        tracks: AsyncIterator[UniversalTrack],
+        *,
+        max_tracks: int | None,
+    ) -> tuple[UniversalTrack, ...]:
+        """Reads up to ``max_tracks`` tracks, closing the iterator so that no pages past them are fetched."""
+        collected = []
+        async with contextlib.aclosing(tracks):
+            async for track in tracks:
+                if max_tracks is not None and len(collected) >= max_tracks:
+                    break
+                collected.append(track)
+        return tuple(collected)
+
+    async def get_playlist_version(self, playlist_id: str) -> str | None:
+        """Returns a token that changes whenever the playlist does, or None if the platform has no cheap way to tell.
+
+        Platforms should only override this if it takes a single small request, since it runs before every conversion.
+        """
+        return None
+
+    async def iter_playlist_tracks(self, playlist_id: str) -> AsyncIterator[UniversalTrack]:
+        """Yields the tracks of a playlist as they are fetched, yielding nothing if the playlist can't be found.
+
+        Platforms that paginate playlists should override this to yield each page as soon as it arrives.
+        """
+        if (playlist := await self.get_playlist_content(playlist_id)) is None:
+            return
+        for track in playlist.tracks:
+            yield track
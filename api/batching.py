@@ -0,0 +1,72 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+from typing import Generic, TypeVar
+
+__all__ = [
+    "MicroBatcher",
+]
+
+_KT = TypeVar("_KT", bound=Hashable)
+_VT = TypeVar("_VT")
+
+
+class MicroBatcher(Generic[_KT, _VT]):
+    """Collects single lookups made within a short window and resolves them together with one bulk call.
+
+    ``fetch_many`` is given the collected keys and must return one result per key, in the same order.
+    """
+
+    def __init__(
+        self,
+        fetch_many: Callable[[Sequence[_KT]], Awaitable[Sequence[_VT]]],
+        *,
+        window: float,
+        max_batch_size: int,
+    ):
+        self.fetch_many = fetch_many
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending: dict[_KT, list[asyncio.Future[_VT]]] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # Batches being resolved, kept referenced so that they aren't garbage collected part way through
+        self._resolving: set[asyncio.Task[None]] = set()
+
+    async def submit(self, key: _KT) -> _VT:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.create_task(self._resolve(batch))
+            self._resolving.add(task)
+            task.add_done_callback(self._resolving.discard)
+
+    async def _resolve(self, batch: dict[_KT, list[asyncio.Future[_VT]]]) -> None:
+        keys = list(batch)
+        try:
+            results = await self.fetch_many(keys)
+            for key, result in zip(keys, results):
+                for future in batch[key]:
+                    if not future.done():
+                        future.set_result(result)
+        except Exception as error:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+        finally:
+            # Only does anything if resolving was cancelled, otherwise the callers would wait forever
+            for futures in batch.values():
+                for future in futures:
+                    future.cancel()
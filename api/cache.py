@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Generic, TypeVar
+
+__all__ = [
+    "TTLCache",
+]
+
+_KT = TypeVar("_KT", bound=Hashable)
+_VT = TypeVar("_VT")
+
+
+class TTLCache(Generic[_KT, _VT]):
+    """A size bounded least-recently-used cache where entries also expire after a set amount of time."""
+
+    def __init__(self, *, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[_KT, tuple[float, _VT]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: _KT) -> bool:
+        # Not counted as a hit or miss, so that checking before getting doesn't count the lookup twice
+        try:
+            expires_at, _ = self._entries[key]
+        except KeyError:
+            return False
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False
+        return True
+
+    def get(self, key: _KT, default=None) -> _VT | None:
+        try:
+            expires_at, value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: _KT, value: _VT) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: _KT, default=None) -> _VT | None:
+        try:
+            return self._entries.pop(key)[1]
+        except KeyError:
+            return default
+
+    def clear(self) -> None:
+        self._entries.clear()
+
@@ -0,0 +1,71 @@
+import time
+from typing import Literal
+
+from .errors import CircuitOpenError
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitState",
+]
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class CircuitBreaker:
+    """Stops sending requests to a platform that keeps failing, so callers fail fast instead of waiting on it.
+
+    After ``failure_threshold`` failures in a row the circuit opens and every request raises
+    :class:`CircuitOpenError`. Once ``reset_timeout`` seconds have passed a single probe request is let through:
+    if it succeeds the circuit closes again, otherwise it stays open for another ``reset_timeout`` seconds.
+    """
+
+    def __init__(self, *, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> CircuitState:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def before_request(self) -> None:
+        """Raises :class:`CircuitOpenError` if the request should not be sent."""
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return
+        retry_after = max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+        raise CircuitOpenError(f"{self.name} is unavailable", retry_after=retry_after)
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self._probing or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self) -> None:
+        """Lets another request probe, for when a probe ended without telling us anything, like being cancelled."""
+        self._probing = False
+
+    def __repr__(self):
+        return (
+            f"<CircuitBreaker"
+            f" name={self.name!r}"
+            f" state={self.state!r}"
+            f" consecutive_failures={self.consecutive_failures}"
+            f">"
+        )
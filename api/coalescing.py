@@ -0,0 +1,29 @@
+import asyncio
+import functools
+from collections.abc import Awaitable, Callable
+from typing import ParamSpec, TypeVar
+
+__all__ = [
+    "coalesce",
+]
+
+_P = ParamSpec("_P")
+_T = TypeVar("_T")
+
+
+def coalesce(method: Callable[_P, Awaitable[_T]]) -> Callable[_P, Awaitable[_T]]:
+    """Makes concurrent calls to an API method with the same arguments share a single in-flight call.
+
+    Callers receive the very same result object, so they must not modify it.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        key = (method.__qualname__, args, tuple(sorted(kwargs.items())))
+        if (in_flight := self._in_flight.get(key)) is None:
+            in_flight = asyncio.ensure_future(method(self, *args, **kwargs))
+            self._in_flight[key] = in_flight
+            in_flight.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded so that one caller giving up does not cancel the call for everyone else waiting on it
+        return await asyncio.shield(in_flight)
+
+    return wrapper
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+
+import aiohttp
+
+from .errors import CoverDownloadError
+
+__all__ = [
+    "CoverCache",
+]
+
+
+class CoverCache:
+    """Downloads cover images and keeps the most recently used ones in memory, up to a total number of bytes."""
+
+    def __init__(self, *, max_bytes: int, max_image_bytes: int, timeout: float):
+        self.max_bytes = max_bytes
+        self.max_image_bytes = max_image_bytes
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._images: OrderedDict[str, bytes] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def get(self, url: str) -> bytes | None:
+        if (image := self._images.get(url)) is None:
+            self.misses += 1
+            return None
+        self._images.move_to_end(url)
+        self.hits += 1
+        return image
+
+    def put(self, url: str, image: bytes) -> None:
+        if len(image) > self.max_bytes:
+            return
+        if (previous := self._images.pop(url, None)) is not None:
+            self.size -= len(previous)
+        self._images[url] = image
+        self.size += len(image)
+        while self.size > self.max_bytes:
+            _, evicted = self._images.popitem(last=False)
+            self.size -= len(evicted)
+
+    async def fetch(self, url: str, *, session: aiohttp.ClientSession) -> bytes:
+        """Returns the image at the url, downloading it if it is not cached.
+
+        Raises :class:`CoverDownloadError` if the response is not an image, is too large or takes too long.
+        """
+        if (image := self.get(url)) is not None:
+            return image
+
+        try:
+            async with session.get(url, timeout=self.timeout) as response:
+                if response.status != 200:
+                    raise CoverDownloadError(f"Got status {response.status} when downloading {url}")
+                if not response.content_type.startswith("image/"):
+                    raise CoverDownloadError(f"{url} is not an image but {response.content_type}")
+                if (response.content_length or 0) > self.max_image_bytes:
+                    raise CoverDownloadError(f"{url} is larger than {self.max_image_bytes} bytes")
+
+                # The content length can't be trusted, so the limit is also checked while reading
+                buffer = bytearray()
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    buffer.extend(chunk)
+                    if len(buffer) > self.max_image_bytes:
+                        raise CoverDownloadError(f"{url} is larger than {self.max_image_bytes} bytes")
+        except (aiohttp.ClientError, TimeoutError) as error:
+            raise CoverDownloadError(f"Could not download {url}") from error
+
+        image = bytes(buffer)
+        self.put(url, image)
+        return image
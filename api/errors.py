@@ -1,2 +1,30 @@
 class InvalidURLError(Exception):
     pass
+
+
+class CoverDownloadError(Exception):
+    pass
+
+
+class InstanceUnavailableError(Exception):
+    pass
+
+
+class TrackLookupError(Exception):
+    """A track could not be looked up, as opposed to it not existing."""
+
+
+class PlaylistIncompleteError(Exception):
+    """A later page of a playlist could not be fetched, so only part of it was read."""
+
+
+class RateLimitedError(Exception):
+    def __init__(self, message: str, *, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, message: str, *, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -1,18 +1,38 @@
+import asyncio
+import contextlib
 import io
+import json
+import os
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Mapping
 
 import aiohttp
 import discord
+from aiohttp import web
 from discord.ext import commands, tasks
 
 import breadcord
 from .abc import AbstractOAuthAPI, AbstractAPI
+from .cache import TTLCache
+from .circuit import CircuitBreaker
+from .covers import CoverCache
+from .errors import InvalidURLError
+from .instances import InstancePool
+from .metrics import MetricsRegistry
+from .progress import ConversionProgress
+from .ratelimit import TokenBucket
+from .routing import URLRouter
+from .storage import TrackMappingStore
+from .tracing import Trace, create_trace_config, span, start_trace
+from .transport import client_timeout, create_session
 from .types import APIInterface
-from .universals import UniversalTrack
+from .universals import UniversalPlaylist, UniversalTrack
 
 __all__ = [
     "PlatformConverter",
     "PlatformAPICog",
     "track_embed",
+    "playlist_description",
     "track_to_query",
     "url_to_file"
 ]
@@ -34,6 +54,9 @@ class PlatformConverter(commands.Converter):
 
 
 class PlatformAPICog(breadcord.module.ModuleCog):
+    # How many tracks convert_tracks converts at once, fetching more tracks waits until one of them is done
+    MAX_PENDING_CONVERSIONS = 100
+
     def __init__(self, module_id: str):
         super().__init__(module_id)
 
@@ -47,9 +70,49 @@ class PlatformAPICog(breadcord.module.ModuleCog):
             "beatsaver": BeatSaverAPI,
             "invidious": InvidiousAPI,
         }
+        # Maps (source platform, source track id, target platform) to the url of the converted track
+        self.conversion_cache: TTLCache[tuple[str, str, str], str] = TTLCache(
+            max_size=self.settings.conversion_cache_size.value,
+            ttl=self.settings.conversion_cache_ttl.value,
+        )
+        self.mapping_store = TrackMappingStore(
+            self.module.storage_path / "track_mappings.sqlite",
+            ttl=self.settings.track_mapping_ttl.value,
+        )
+        # Conversions that found nothing, or whose source track id doesn't exist, so they aren't retried right away
+        self.negative_conversion_cache: TTLCache[tuple[str, str, str], bool] = TTLCache(
+            max_size=self.settings.conversion_cache_size.value,
+            ttl=self.settings.negative_conversion_cache_ttl.value,
+        )
+        # Limits how many conversions may search on each target platform at once
+        self.conversion_semaphores: dict[str, asyncio.Semaphore] = {}
+        self.url_router: URLRouter | None = None
+        self.cover_cache = CoverCache(
+            max_bytes=self.settings.cover_cache_size.value,
+            max_image_bytes=self.settings.max_cover_size.value,
+            timeout=self.settings.cover_download_timeout.value,
+        )
+        self.metrics = MetricsRegistry()
+        self.metrics.register_cache("conversions", self.conversion_cache)
+        self.metrics.register_cache("negative_conversions", self.negative_conversion_cache)
+        self.metrics.register_cache("track_mapping_store", self.mapping_store)
+        self.metrics.register_cache("covers", self.cover_cache)
+        self.metrics_runner: web.AppRunner | None = None
 
     async def cog_load(self) -> None:
-        self.session = aiohttp.ClientSession()
+        http_settings: breadcord.config.SettingsGroup = self.settings.http
+        self.session = create_session(
+            limit=http_settings.connection_limit.value,
+            limit_per_host=http_settings.connection_limit_per_host.value,
+            keepalive_timeout=http_settings.keepalive_timeout.value,
+            dns_cache_ttl=http_settings.dns_cache_ttl.value,
+            timeout=client_timeout(
+                connect=http_settings.connect_timeout.value,
+                read=http_settings.read_timeout.value,
+                total=http_settings.total_timeout.value,
+            ),
+            trace_configs=[create_trace_config()],
+        )
         handled_api_interfaces: dict[str, APIInterface] = {}
 
         for platform_name in self.settings.active_platforms.value:
@@ -58,31 +121,240 @@ class PlatformAPICog(breadcord.module.ModuleCog):
                 self.logger.warning(f"Unknown platform {platform_name}")
                 continue
 
+            platform_settings: breadcord.config.SettingsGroup = getattr(self.settings, platform_name)
+            common_options = dict(
+                session=self.session,
+                rate_limiter=TokenBucket(
+                    rate=platform_settings.requests_per_second.value,
+                    capacity=platform_settings.request_burst.value,
+                ),
+                max_retries=self.settings.max_request_retries.value,
+                max_retry_after=self.settings.max_retry_after.value,
+                timeout=client_timeout(
+                    connect=platform_settings.connect_timeout.value,
+                    read=platform_settings.read_timeout.value,
+                    total=platform_settings.total_timeout.value,
+                ),
+                circuit_breaker=CircuitBreaker(
+                    name=platform_name,
+                    failure_threshold=self.settings.circuit_breaker_threshold.value,
+                    reset_timeout=self.settings.circuit_breaker_reset_timeout.value,
+                ),
+            )
             if issubclass(api_interface, AbstractOAuthAPI):
-                platform_settings: breadcord.config.SettingsGroup = getattr(self.settings, platform_name)
                 handled_api_interfaces[platform_name] = api_interface(
                     client_id=platform_settings.client_id.value,
                     client_secret=platform_settings.client_secret.value,
-                    session=self.session
+                    **common_options,
+                )
+            elif issubclass(api_interface, InvidiousAPI):
+                handled_api_interfaces[platform_name] = api_interface(
+                    instance_pool=InstancePool(
+                        platform_settings.instances.value,
+                        hedge_percentile=platform_settings.hedge_percentile.value or None,
+                        failure_threshold=platform_settings.instance_failure_threshold.value,
+                        cooldown=platform_settings.instance_cooldown.value,
+                    ),
+                    **common_options,
                 )
             elif issubclass(api_interface, AbstractAPI):
-                handled_api_interfaces[platform_name] = api_interface(session=self.session)
+                handled_api_interfaces[platform_name] = api_interface(**common_options)
+
+            self.conversion_semaphores[platform_name] = asyncio.Semaphore(
+                platform_settings.max_concurrent_requests.value
+            )
 
         self.api_interfaces = handled_api_interfaces
-        self.refresh_access_tokens.start()
+        for platform_name, api in self.api_interfaces.items():
+            self.metrics.instrument(api, platform_name)
+        self.url_router = URLRouter(self.api_interfaces)
+
+        await self.mapping_store.open()
+        # Oldest first, so that the most recently converted tracks end up as the most recently used cache entries
+        for source_platform, source_id, target_platform, target_url in reversed(
+            await self.mapping_store.recent(self.conversion_cache.max_size)
+        ):
+            self.conversion_cache.set((source_platform, source_id, target_platform), target_url)
+        self.compact_mapping_store.start()
+
+        if port := self.settings.metrics_port.value:
+            await self.start_metrics_server(self.settings.metrics_host.value, port)
+        if interval := self.settings.metrics_file_interval.value:
+            self.write_metrics_file.change_interval(seconds=interval)
+            self.write_metrics_file.start()
 
     async def cog_unload(self) -> None:
+        for api in self.api_interfaces.values():
+            if isinstance(api, AbstractOAuthAPI):
+                api.stop_token_refresh()
+        self.compact_mapping_store.cancel()
+        self.write_metrics_file.cancel()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+        await self.mapping_store.close()
         await self.session.close()
 
-    @tasks.loop(minutes=20)
-    async def refresh_access_tokens(self):
-        if self.session.closed:
+    @tasks.loop(hours=6)
+    async def compact_mapping_store(self):
+        if removed := await self.mapping_store.compact():
+            self.logger.debug(f"Removed {removed} expired track mappings")
+
+    async def start_metrics_server(self, host: str, port: int) -> None:
+        """Serves the collected metrics for Prometheus to scrape at ``/metrics``."""
+        async def serve_metrics(_: web.Request) -> web.Response:
+            return web.Response(text=self.metrics.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+        app = web.Application()
+        app.router.add_get("/metrics", serve_metrics)
+        self.metrics_runner = web.AppRunner(app, access_log=None)
+        await self.metrics_runner.setup()
+        await web.TCPSite(self.metrics_runner, host, port).start()
+
+    @tasks.loop(minutes=1)
+    async def write_metrics_file(self):
+        path = self.module.storage_path / "metrics.prom"
+        temporary_path = path.with_suffix(".prom.tmp")
+
+        def write() -> None:
+            # Written to a separate file first, so that a scraper never reads a half written file
+            temporary_path.write_text(self.metrics.render_prometheus(), encoding="utf-8")
+            os.replace(temporary_path, path)
+
+        await asyncio.to_thread(write)
+
+    @contextlib.asynccontextmanager
+    async def traced(self, name: str, **attributes) -> AsyncIterator[Trace]:
+        """Traces a conversion, writing it to the slow conversion log if it takes too long."""
+        error = None
+        with start_trace(name, **attributes) as trace:
+            try:
+                yield trace
+            except Exception as exception:
+                trace.attributes["error"] = repr(exception)
+                error = exception
+        # Only once the trace has ended, so that its duration is known
+        await self.log_if_slow(trace)
+        if error is not None:
+            raise error
+
+    async def log_if_slow(self, trace: Trace) -> None:
+        if not (threshold := self.settings.slow_conversion_threshold.value) or trace.duration < threshold:
             return
-        for api in self.api_interfaces.values():
-            if hasattr(api, "refresh_access_token"):
-                self.logger.debug(f"Refreshing {api.__class__.__name__} access token")
-                await api.refresh_access_token()
-                self.logger.debug(f"Refreshed {api.__class__.__name__} access token")
+        self.logger.warning(f"Slow {trace.name} took {trace.duration:.2f}s")
+        line = json.dumps({"logged_at": time.time(), **trace.to_dict()}, ensure_ascii=False)
+
+        def append() -> None:
+            with open(self.module.storage_path / "slow_conversions.jsonl", "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+
+        await asyncio.to_thread(append)
+
+    async def convert_track(
+        self,
+        from_platform: str,
+        to_platform: str,
+        track_id: str,
+        *,
+        track: UniversalTrack | None = None,
+    ) -> str | None:
+        """Finds the url of the closest match on another platform for a track, using the conversion cache if possible.
+
+        If the source track has already been fetched it can be passed as ``track`` to skip looking it up by id.
+        """
+        cache_key = (from_platform, track_id, to_platform)
+        if (cached_url := self.conversion_cache.get(cache_key)) is not None:
+            return cached_url
+        if self.negative_conversion_cache.get(cache_key):
+            return None
+        if (stored_url := await self.mapping_store.get(*cache_key)) is not None:
+            self.conversion_cache.set(cache_key, stored_url)
+            return stored_url
+
+        if track is None:
+            with span("track_from_id", platform=from_platform, track_id=track_id):
+                track = await self.api_interfaces[from_platform].track_from_id(track_id)
+            # Platforms raise if the lookup failed, so None means the track really doesn't exist
+            if track is None:
+                self.negative_conversion_cache.set(cache_key, True)
+                return None
+        with span("track_to_query"):
+            query = track_to_query(track)
+
+        semaphore = self.conversion_semaphores[to_platform]
+        with span("search_queue", platform=to_platform):
+            await semaphore.acquire()
+        try:
+            with span("search_tracks", platform=to_platform):
+                tracks = await self.api_interfaces[to_platform].search_tracks(query)
+        finally:
+            semaphore.release()
+        if tracks is None:
+            # The search failed rather than found nothing, so it is worth trying again
+            return None
+        if not tracks:
+            self.negative_conversion_cache.set(cache_key, True)
+            return None
+
+        self.conversion_cache.set(cache_key, tracks[0].url)
+        await self.mapping_store.set(*cache_key, tracks[0].url)
+        return tracks[0].url
+
+    async def convert_tracks(
+        self,
+        from_platform: str,
+        to_platform: str,
+        tracks: AsyncIterable[UniversalTrack],
+        *,
+        progress: ConversionProgress | None = None,
+        first_index: int = 0,
+        previous_results: Mapping[str, str | None] | None = None,
+    ) -> list[str | None]:
+        """Converts a stream of already fetched tracks concurrently, keeping the order they were given in.
+
+        Each track starts converting as soon as it arrives, so conversion overlaps with fetching later tracks.
+        Tracks that could not be converted, including ones that failed with an error, are returned as ``None``.
+        The tracks are reported to ``progress`` numbered from ``first_index``.
+        Tracks whose url maps to a converted url in ``previous_results`` reuse it instead of being converted again.
+        """
+        from_interface = self.api_interfaces[from_platform]
+        previous_results = previous_results or {}
+
+        pending_slots = asyncio.Semaphore(self.MAX_PENDING_CONVERSIONS)
+
+        async def convert(index: int, track: UniversalTrack) -> str | None:
+            if (converted_url := previous_results.get(track.url)) is None:
+                try:
+                    track_id = from_interface.get_track_id(track.url)
+                except InvalidURLError:
+                    track_id = track.url
+                try:
+                    converted_url = await self.convert_track(from_platform, to_platform, track_id, track=track)
+                except Exception as error:
+                    self.logger.warning(f"Could not convert {track.url} to {to_platform}: {error!r}")
+                    converted_url = None
+
+            if progress is not None:
+                progress.track_converted(index, converted_url)
+            return converted_url
+
+        conversions = []
+        try:
+            async for track in tracks:
+                await pending_slots.acquire()
+                conversion = asyncio.create_task(convert(first_index + len(conversions), track))
+                conversion.add_done_callback(lambda _: pending_slots.release())
+                conversions.append(conversion)
+                if progress is not None:
+                    progress.track_queued()
+            if progress is not None:
+                progress.all_queued()
+            return list(await asyncio.gather(*conversions))
+        except BaseException:
+            # Don't leave conversions running after the stream failed or the caller was cancelled
+            for conversion in conversions:
+                conversion.cancel()
+            await asyncio.gather(*conversions, return_exceptions=True)
+            raise
 
 
 def track_embed(
@@ -104,11 +376,40 @@ def track_embed(
     ).set_thumbnail(url=cover_url or track.cover_url)
 
 
+def playlist_description(playlist: UniversalPlaylist, *, max_tracks: int) -> str:
+    """The playlist's description followed by a numbered list of up to ``max_tracks`` of its tracks."""
+    description = discord.utils.escape_markdown(playlist.description.strip()) if playlist.description else ""
+    description += "\n\n**Tracks**"
+    for i, track in enumerate(playlist.tracks):
+        title = discord.utils.escape_markdown(track.title)
+        artists = ", ".join(map(discord.utils.escape_markdown, track.artist_names))
+
+        # The tracks may only be the first few of the playlist, so the count comes from the playlist if it has one
+        if playlist.track_count is None:
+            fallback_text = "\n\nAnd more..."
+        else:
+            fallback_text = f"\n\nAnd {playlist.track_count - i} more..." if i != playlist.track_count - 1 else ""
+        addition = f"{i + 1}. [{title}]({track.url}) - {artists}"
+        if len(description) + len(addition) + len(fallback_text) >= 4096 or i >= max_tracks:
+            description += fallback_text
+            break
+        description += f"\n{addition}"
+    return description
+
+
 def track_to_query(track: UniversalTrack) -> str:
     return f"{track.title} {' '.join(track.artist_names)}"
 
 
-async def url_to_file(url: str, *, session: aiohttp.ClientSession) -> io.BytesIO:
-    async with session.get(url) as response:
-        return io.BytesIO(await response.read())
+async def url_to_file(
+    url: str,
+    *,
+    session: aiohttp.ClientSession,
+    cover_cache: CoverCache,
+    metrics: MetricsRegistry | None = None,
+) -> io.BytesIO:
+    download = cover_cache.fetch(url, session=session)
+    if metrics is not None:
+        download = metrics.timed("covers", "url_to_file", download)
+    return io.BytesIO(await download)
 
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+import aiohttp
+
+from .errors import InstanceUnavailableError
+
+__all__ = [
+    "InstanceHealth",
+    "InstancePool",
+]
+
+_T = TypeVar("_T")
+
+# Errors that mean something is wrong with the instance, rather than with the request itself
+_INSTANCE_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, InstanceUnavailableError)
+
+
+class InstanceHealth:
+    # How many recent latencies are kept to calculate percentiles from
+    SAMPLE_SIZE = 50
+
+    def __init__(self, url: str):
+        self.url = url.removesuffix("/")
+        self.latencies: deque[float] = deque(maxlen=self.SAMPLE_SIZE)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.disabled_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return self.disabled_until <= time.monotonic()
+
+    @property
+    def average_latency(self) -> float:
+        return sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+    def latency_percentile(self, percentile: float) -> float | None:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+    def __repr__(self):
+        return (
+            f"<InstanceHealth"
+            f" url={self.url!r}"
+            f" average_latency={self.average_latency:.3f}"
+            f" consecutive_failures={self.consecutive_failures}"
+            f" available={self.available}"
+            f">"
+        )
+
+
+class InstancePool:
+    """Spreads requests over several instances of the same service, preferring the fastest healthy one.
+
+    Instances that fail ``failure_threshold`` times in a row are taken out of rotation for ``cooldown`` seconds.
+    When ``hedge_percentile`` is set, a duplicate request is sent to the next best instance if the first one
+    takes longer than that percentile of its recent latencies, and whichever answers first wins.
+    """
+
+    # How many latencies an instance needs before it is hedged against, so that percentiles mean something
+    MIN_HEDGE_SAMPLES = 5
+
+    def __init__(
+        self,
+        urls: list[str],
+        *,
+        hedge_percentile: float | None = None,
+        failure_threshold: int = 3,
+        cooldown: float = 300,
+    ):
+        if not urls:
+            raise ValueError("An instance pool needs at least one instance")
+        self.instances = [InstanceHealth(url) for url in urls]
+        self.hedge_percentile = hedge_percentile
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+    def ranked(self) -> list[InstanceHealth]:
+        """Available instances from fastest to slowest, or every instance if none are available."""
+        if available := [instance for instance in self.instances if instance.available]:
+            # Instances without any measurements yet go first so that they get measured
+            return sorted(available, key=lambda instance: (bool(instance.latencies), instance.average_latency))
+        return sorted(self.instances, key=lambda instance: instance.disabled_until)
+
+    async def _attempt(self, instance: InstanceHealth, call: Callable[[str], Awaitable[_T]]) -> _T:
+        started_at = time.monotonic()
+        try:
+            result = await call(instance.url)
+        except _INSTANCE_ERRORS:
+            instance.failures += 1
+            instance.consecutive_failures += 1
+            if instance.consecutive_failures >= self.failure_threshold:
+                instance.disabled_until = time.monotonic() + self.cooldown
+            raise
+        instance.latencies.append(time.monotonic() - started_at)
+        instance.successes += 1
+        instance.consecutive_failures = 0
+        return result
+
+    async def run(self, call: Callable[[str], Awaitable[_T]]) -> _T:
+        """Calls ``call`` with an instance url, failing over to the next instance if it fails."""
+        candidates = self.ranked()
+        pending: set[asyncio.Task[_T]] = set()
+        last_error: BaseException | None = None
+        try:
+            while candidates or pending:
+                if not pending:
+                    instance = candidates.pop(0)
+                    pending.add(asyncio.create_task(self._attempt(instance, call)))
+                    hedge_after = (
+                        instance.latency_percentile(self.hedge_percentile)
+                        if self.hedge_percentile and len(instance.latencies) >= self.MIN_HEDGE_SAMPLES
+                        else None
+                    )
+                else:
+                    hedge_after = None
+
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=hedge_after if candidates else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    # Taking unusually long, race a duplicate request against it
+                    pending.add(asyncio.create_task(self._attempt(candidates.pop(0), call)))
+                    continue
+
+                for task in done:
+                    if (error := task.exception()) is None:
+                        return task.result()
+                    if not isinstance(error, _INSTANCE_ERRORS):
+                        raise error
+                    last_error = error
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise InstanceUnavailableError("Every instance failed") from last_error
@@ -0,0 +1,79 @@
+import dataclasses
+import secrets
+import time
+from typing import Any, Literal
+
+__all__ = [
+    "JobStatus",
+    "ACTIVE_JOB_STATUSES",
+    "PlaylistJob",
+    "PlaylistSnapshot",
+]
+
+JobStatus = Literal["queued", "running", "finished", "failed", "cancelled"]
+# Jobs in these states are picked back up when the cog loads
+ACTIVE_JOB_STATUSES: tuple[JobStatus, ...] = ("queued", "running")
+
+
+@dataclasses.dataclass(kw_only=True)
+class PlaylistJob:
+    """A playlist conversion running in the background, along with how far it got."""
+
+    id: str = dataclasses.field(default_factory=lambda: secrets.token_hex(4))
+    guild_id: int | None
+    channel_id: int
+    user_id: int
+    from_platform: str
+    to_platform: str
+    playlist_id: str
+    url: str
+    # The first track to convert, starting at 1
+    start_index: int = 1
+    # None for no limit
+    max_tracks: int | None = None
+    status: JobStatus = "queued"
+    # The converted urls of the tracks finished so far, in playlist order and without gaps
+    results: list[str | None] = dataclasses.field(default_factory=list)
+    # The urls of the source tracks queued so far, in playlist order
+    track_urls: list[str] = dataclasses.field(default_factory=list)
+    truncated: bool = False
+    error: str | None = None
+    created_at: float = dataclasses.field(default_factory=time.time)
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_JOB_STATUSES
+
+    def describe(self) -> str:
+        """A one line summary for status messages."""
+        found = sum(1 for url in self.results if url)
+        return (
+            f"`{self.id}` {self.status}: <{self.url}> to {self.to_platform}, "
+            f"{len(self.results)} tracks done ({found} found)"
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "PlaylistJob":
+        return cls(**data)
+
+
+@dataclasses.dataclass(kw_only=True)
+class PlaylistSnapshot:
+    """How a playlist was last converted to a platform, so that converting it again only has to redo what changed."""
+
+    # Changes whenever the playlist does, None if the platform has no cheap way to tell
+    version: str | None
+    # Pairs of source track url and converted url, in playlist order
+    tracks: list[tuple[str, str | None]]
+    truncated: bool = False
+    updated_at: float = dataclasses.field(default_factory=time.time)
+
+    def to_dict(self) -> dict[str, Any]:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "PlaylistSnapshot":
+        return cls(**{**data, "tracks": [tuple(track) for track in data["tracks"]]})
@@ -0,0 +1,238 @@
+import bisect
+import contextlib
+import contextvars
+import functools
+import inspect
+import math
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Protocol, TypeVar
+
+__all__ = [
+    "LatencyHistogram",
+    "CallMetrics",
+    "MetricsRegistry",
+    "INSTRUMENTED_METHODS",
+]
+
+_T = TypeVar("_T")
+
+# The API methods whose calls are timed when an API is instrumented
+INSTRUMENTED_METHODS = (
+    "track_from_id",
+    "tracks_from_ids",
+    "search_tracks",
+    "get_playlist_content",
+    "get_playlist_version",
+    "iter_playlist_tracks",
+)
+
+# The platform whose instrumented call is being timed, if any
+# Calls it makes to its own instrumented methods, like the default tracks_from_ids calling track_from_id, are not
+# timed again, so that each call from outside is only counted once
+_timed_platform: contextvars.ContextVar[str | None] = contextvars.ContextVar("timed_platform", default=None)
+
+
+class _CacheStats(Protocol):
+    hits: int
+    misses: int
+
+
+class LatencyHistogram:
+    """Counts how many observations fell below each of a fixed set of bounds, like a Prometheus histogram."""
+
+    # Upper bounds of the buckets, in seconds
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, math.inf)
+
+    def __init__(self):
+        self.counts = [0] * len(self.BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def percentile(self, percentile: float) -> float | None:
+        """The upper bound of the bucket the given percentile falls into, None if nothing was observed."""
+        if not self.total:
+            return None
+        wanted = self.total * percentile / 100
+        cumulative = 0
+        for bound, count in zip(self.BUCKETS, self.counts):
+            cumulative += count
+            if cumulative >= wanted:
+                return bound
+        return math.inf
+
+
+class CallMetrics:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+
+
+class MetricsRegistry:
+    """Collects call counts, errors and latencies per platform and method, and the hit rates of caches."""
+
+    def __init__(self):
+        self.calls: dict[tuple[str, str], CallMetrics] = {}
+        self.caches: dict[str, _CacheStats] = {}
+
+    def observe(self, platform: str, method: str, seconds: float, *, error: bool = False) -> None:
+        metrics = self.calls.setdefault((platform, method), CallMetrics())
+        metrics.calls += 1
+        metrics.errors += error
+        metrics.latency.observe(seconds)
+
+    async def timed(self, platform: str, method: str, awaitable: Awaitable[_T]) -> _T:
+        """Awaits something, recording how long it took and whether it raised."""
+        started_at = time.perf_counter()
+        try:
+            result = await awaitable
+        except Exception:
+            self.observe(platform, method, time.perf_counter() - started_at, error=True)
+            raise
+        self.observe(platform, method, time.perf_counter() - started_at)
+        return result
+
+    def instrument(self, api: object, platform: str) -> None:
+        """Times every call to the :data:`INSTRUMENTED_METHODS` an API has."""
+        for method_name in INSTRUMENTED_METHODS:
+            method = getattr(api, method_name, None)
+            if method is None:
+                continue
+            if inspect.iscoroutinefunction(method):
+                setattr(api, method_name, self._wrap(method, platform, method_name))
+            elif inspect.isasyncgenfunction(method):
+                setattr(api, method_name, self._wrap_iterator(method, platform, method_name))
+
+    def _wrap(self, method: Callable[..., Awaitable[_T]], platform: str, method_name: str):
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs) -> _T:
+            if _timed_platform.get() == platform:
+                return await method(*args, **kwargs)
+            token = _timed_platform.set(platform)
+            try:
+                return await self.timed(platform, method_name, method(*args, **kwargs))
+            finally:
+                _timed_platform.reset(token)
+
+        return wrapper
+
+    def _wrap_iterator(self, method: Callable[..., AsyncIterator[_T]], platform: str, method_name: str):
+        """Like :meth:`_wrap`, for async generators.
+
+        A whole iteration counts as one call, and only the time spent fetching items is recorded, not the time the
+        consumer spends between them.
+        """
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs) -> AsyncIterator[_T]:
+            iterator = method(*args, **kwargs)
+            if _timed_platform.get() == platform:
+                async with contextlib.aclosing(iterator):
+                    async for item in iterator:
+                        yield item
+                return
+
+            busy_for = 0.0
+            error = False
+            try:
+                while True:
+                    # Set and reset within each step, since the consumer runs in the same context between steps
+                    token = _timed_platform.set(platform)
+                    started_at = time.perf_counter()
+                    try:
+                        item = await anext(iterator)
+                    except StopAsyncIteration:
+                        break
+                    except Exception:
+                        error = True
+                        raise
+                    finally:
+                        busy_for += time.perf_counter() - started_at
+                        _timed_platform.reset(token)
+                    yield item
+            finally:
+                await iterator.aclose()
+                self.observe(platform, method_name, busy_for, error=error)
+
+        return wrapper
+
+    def register_cache(self, name: str, cache: _CacheStats) -> None:
+        """Reports the hit rate of anything with ``hits`` and ``misses`` counters."""
+        self.caches[name] = cache
+
+    def summary(self) -> str:
+        """A human readable table of everything collected so far."""
+        lines = [f"{'call':<36} {'calls':>7} {'errors':>6} {'avg':>7} {'p50':>6} {'p95':>6}"]
+        for (platform, method), metrics in sorted(self.calls.items()):
+            average = metrics.latency.sum / metrics.latency.total
+            lines.append(
+                f"{f'{platform}.{method}':<36} {metrics.calls:>7} {metrics.errors:>6} {average * 1000:>5.0f}ms"
+                f" {_format_bound(metrics.latency.percentile(50)):>6} {_format_bound(metrics.latency.percentile(95)):>6}"
+            )
+        lines.append("")
+        lines.append(f"{'cache':<36} {'hits':>7} {'misses':>6} {'rate':>7}")
+        for name, cache in sorted(self.caches.items()):
+            lookups = cache.hits + cache.misses
+            rate = f"{cache.hits / lookups:.0%}" if lookups else "-"
+            lines.append(f"{name:<36} {cache.hits:>7} {cache.misses:>6} {rate:>7}")
+        return "\n".join(lines)
+
+    def render_prometheus(self) -> str:
+        """Everything collected so far in the Prometheus text exposition format."""
+        lines = [
+            "# HELP platform_converter_calls_total API calls made, by platform and method.",
+            "# TYPE platform_converter_calls_total counter",
+        ]
+        for (platform, method), metrics in sorted(self.calls.items()):
+            lines.append(f'platform_converter_calls_total{{{_labels(platform, method)}}} {metrics.calls}')
+
+        lines += [
+            "# HELP platform_converter_errors_total API calls that raised an error, by platform and method.",
+            "# TYPE platform_converter_errors_total counter",
+        ]
+        for (platform, method), metrics in sorted(self.calls.items()):
+            lines.append(f'platform_converter_errors_total{{{_labels(platform, method)}}} {metrics.errors}')
+
+        lines += [
+            "# HELP platform_converter_call_duration_seconds How long API calls took, by platform and method.",
+            "# TYPE platform_converter_call_duration_seconds histogram",
+        ]
+        for (platform, method), metrics in sorted(self.calls.items()):
+            labels = _labels(platform, method)
+            cumulative = 0
+            for bound, count in zip(LatencyHistogram.BUCKETS, metrics.latency.counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(float(bound))
+                lines.append(f'platform_converter_call_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"platform_converter_call_duration_seconds_sum{{{labels}}} {metrics.latency.sum}")
+            lines.append(f"platform_converter_call_duration_seconds_count{{{labels}}} {metrics.latency.total}")
+
+        for result in ("hits", "misses"):
+            lines += [
+                f"# HELP platform_converter_cache_{result}_total Cache lookups that were {result}, by cache.",
+                f"# TYPE platform_converter_cache_{result}_total counter",
+            ]
+            for name, cache in sorted(self.caches.items()):
+                lines.append(f'platform_converter_cache_{result}_total{{cache="{_escape(name)}"}} {getattr(cache, result)}')
+        return "\n".join(lines) + "\n"
+
+
+def _format_bound(bound: float | None) -> str:
+    if bound is None:
+        return "-"
+    if bound == math.inf:
+        return f">{LatencyHistogram.BUCKETS[-2]:g}s"
+    return f"{bound * 1000:.0f}ms" if bound < 1 else f"{bound:g}s"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(platform: str, method: str) -> str:
+    return f'platform="{_escape(platform)}",method="{_escape(method)}"'
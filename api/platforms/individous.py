@@ -1,77 +1,134 @@
 import re
+import urllib.parse
+from collections.abc import AsyncIterator
+from typing import Any
 
 from ..abc import AbstractAPI, AbstractPlaylistAPI
-from ..errors import InvalidURLError
+from ..coalescing import coalesce
+from ..errors import InstanceUnavailableError, InvalidURLError, PlaylistIncompleteError
+from ..instances import InstancePool
 from ..universals import UniversalTrack, UniversalPlaylist
 
 
 def invidious_video_to_universal(video: dict, *, instance_url: str) -> UniversalTrack:
     return UniversalTrack(
         title=video["title"],
-        artist_names=[video["author"]],
+        artist_names=(video["author"],),
         url=f"{instance_url}/watch?v={video['videoId']}",
         cover_url=video["videoThumbnails"][0]["url"],
     )
 
 
 class InvidiousAPI(AbstractAPI, AbstractPlaylistAPI):
-    def __init__(self, *args, invidious_instance_url: str = "https://yt.artemislena.eu", **kwargs):
+    # Flawed regexes, but what can you do when the domain could be anything
+    # The url router only hands these urls from the instances' own hosts though
+    TRACK_URL_PATTERN = re.compile(r"^(?:https?://)?.+\..+watch\?v=([a-zA-Z0-9_\-]+)", flags=re.ASCII)
+    PLAYLIST_URL_PATTERN = re.compile(r"^(?:https?://)?.+\..+playlist\?list=([a-zA-Z0-9_\-]+)", flags=re.ASCII)
+
+    def __init__(self, *args, instance_pool: InstancePool | None = None, **kwargs):
         super().__init__(*args, **kwargs)
-        self.invidious_instance_url = invidious_instance_url.removesuffix("/")
+        self.instance_pool = instance_pool or InstancePool(["https://yt.artemislena.eu"])
+        # Links always point to the first configured instance, no matter which one answered
+        self.invidious_instance_url = self.instance_pool.instances[0].url
+
+    @property
+    def url_hosts(self) -> tuple[str, ...]:
+        return tuple(urllib.parse.urlsplit(instance.url).hostname for instance in self.instance_pool.instances)
+
+    async def _get_json(self, path: str, **params) -> Any | None:
+        """Fetches an API path from the best available instance, returning None if it does not exist."""
+        async def fetch(instance_url: str) -> Any | None:
+            # Not retried here, failing over to another instance straight away is quicker than waiting on this one
+            async with self.request("GET", f"{instance_url}{path}", params=params, retry_statuses=()) as response:
+                # Broken instances often answer with an error page instead of JSON
+                if response.status >= 500 or response.status == 429 or response.content_type != "application/json":
+                    raise InstanceUnavailableError(f"{instance_url} answered with status {response.status}")
+                if response.status != 200:
+                    return None
+                return await response.json()
+
+        return await self.instance_pool.run(fetch)
 
     def get_track_id(self, track_url: str) -> str:
-        # Flawed regex, but what can you do when the domain could be anything
-        if matches := re.match(
-            r"^(?:https?://)?.+\..+watch\?v=([a-zA-Z0-9_\-]+)",
-            track_url,
-            flags=re.ASCII,
-        ):
+        if matches := self.TRACK_URL_PATTERN.match(track_url):
             return matches[1]
         else:
             raise InvalidURLError("Invalid invidious video url")
 
+    @coalesce
     async def track_from_id(self, track_id: str) -> UniversalTrack | None:
-        async with self.session.get(
-            f"{self.invidious_instance_url}/api/v1/videos/{track_id}"
-            f"?fields=title,author,videoId,videoThumbnails"
-        ) as response:
-            data = await response.json()
-            return invidious_video_to_universal(data, instance_url=self.invidious_instance_url)
+        data = await self._get_json(f"/api/v1/videos/{track_id}", fields="title,author,videoId,videoThumbnails")
+        if data is None:
+            return None
+        return invidious_video_to_universal(data, instance_url=self.invidious_instance_url)
 
+    @coalesce
     async def search_tracks(self, query: str) -> list[UniversalTrack] | None:
-        async with self.session.get(
-            f"{self.invidious_instance_url}/api/v1/search?q={query}"
-            f"&fields=title,author,videoId,videoThumbnails,type"
-        ) as response:
-            videos = filter(
-                lambda vid: vid["type"] == "video",
-                await response.json(),
-            )
-            return [invidious_video_to_universal(video, instance_url=self.invidious_instance_url) for video in videos]
+        results = await self._get_json(
+            "/api/v1/search",
+            q=query,
+            fields="title,author,videoId,videoThumbnails,type",
+        )
+        if results is None:
+            return None
+        videos = filter(lambda vid: vid["type"] == "video", results)
+        return [invidious_video_to_universal(video, instance_url=self.invidious_instance_url) for video in videos]
 
     def get_playlist_id(self, playlist_url: str) -> str:
-        if matches := re.match(
-            r"^(?:https?://)?.+\..+playlist\?list=([a-zA-Z0-9_\-]+)",
-            playlist_url,
-            flags=re.ASCII,
-        ):
+        if matches := self.PLAYLIST_URL_PATTERN.match(playlist_url):
             return matches[1]
         else:
             raise InvalidURLError("Invalid invidious playlist url")
 
-    async def get_playlist_content(self, playlist_id: str) -> UniversalPlaylist | None:
-        async with self.session.get(
-            f"{self.invidious_instance_url}/api/v1/playlists/{playlist_id}"
-        ) as response:
-            playlist_info = await response.json()
-            return UniversalPlaylist(
-                name=playlist_info["title"],
-                description=playlist_info.get("description"),
-                owner_names=[playlist_info["author"]],
-                url=f"{self.invidious_instance_url}/playlist?list={playlist_id}",
-                cover_url=playlist_info["videos"][0]["videoThumbnails"][0]["url"],
-                tracks=[
-                    invidious_video_to_universal(video, instance_url=self.invidious_instance_url)
-                    for video in playlist_info["videos"]
-                ]
-            )
\ No newline at end of file
+    @coalesce
+    async def get_playlist_content(
+        self,
+        playlist_id: str,
+        *,
+        max_tracks: int | None = None,
+    ) -> UniversalPlaylist | None:
+        if (playlist_info := await self._get_json(f"/api/v1/playlists/{playlist_id}")) is None:
+            return None
+        return UniversalPlaylist(
+            name=playlist_info["title"],
+            description=playlist_info.get("description"),
+            owner_names=(playlist_info["author"],),
+            url=f"{self.invidious_instance_url}/playlist?list={playlist_id}",
+            cover_url=playlist_info["videos"][0]["videoThumbnails"][0]["url"] if playlist_info["videos"] else None,
+            tracks=tuple(
+                invidious_video_to_universal(video, instance_url=self.invidious_instance_url)
+                for video in playlist_info["videos"][:max_tracks]
+            ),
+            track_count=playlist_info.get("videoCount"),
+        )
+
+    async def get_playlist_version(self, playlist_id: str) -> str | None:
+        playlist_info = await self._get_json(f"/api/v1/playlists/{playlist_id}", fields="updated,videoCount")
+        if not playlist_info or "updated" not in playlist_info:
+            return None
+        return f"{playlist_info['updated']}:{playlist_info.get('videoCount')}"
+
+    async def iter_playlist_tracks(self, playlist_id: str) -> AsyncIterator[UniversalTrack]:
+        page = 1
+        previous_video_ids = None
+        while True:
+            playlist_page = await self._get_json(
+                f"/api/v1/playlists/{playlist_id}",
+                page=page,
+                fields="videos(title,author,videoId,videoThumbnails)",
+            )
+            if playlist_page is None:
+                if page == 1:
+                    return
+                raise PlaylistIncompleteError(f"Could not fetch page {page} of the playlist")
+            videos = playlist_page["videos"]
+
+            # Some instances ignore the page parameter and keep sending the first page
+            video_ids = [video["videoId"] for video in videos]
+            if not videos or video_ids == previous_video_ids:
+                return
+            previous_video_ids = video_ids
+
+            for video in videos:
+                yield invidious_video_to_universal(video, instance_url=self.invidious_instance_url)
+            page += 1
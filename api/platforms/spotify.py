@@ -1,18 +1,21 @@
+import asyncio
 import re
-from datetime import timedelta, datetime
+from collections.abc import AsyncIterator, Sequence
 
 from ..abc import AbstractOAuthAPI, AbstractPlaylistAPI
-from ..errors import InvalidURLError
+from ..batching import MicroBatcher
+from ..coalescing import coalesce
+from ..errors import InvalidURLError, PlaylistIncompleteError, TrackLookupError
 from ..universals import UniversalTrack, UniversalAlbum, UniversalPlaylist
 
 
 def spotify_track_to_universal(track: dict) -> UniversalTrack:
     return UniversalTrack(
         title=track["name"],
-        artist_names=[artist["name"] for artist in track["artists"]],
+        artist_names=tuple(artist["name"] for artist in track["artists"]),
         album=UniversalAlbum(
             title=album["name"],
-            artist_names=[artist["name"] for artist in album["artists"]],
+            artist_names=tuple(artist["name"] for artist in album["artists"]),
             url=album["external_urls"].get("spotify"),
             cover_url=max(
                 album["images"],
@@ -30,12 +33,28 @@ def spotify_track_to_universal(track: dict) -> UniversalTrack:
 
 class SpotifyAPI(AbstractOAuthAPI, AbstractPlaylistAPI):
     API_BASE = "https://api.spotify.com/v1"
+    TOKEN_URL = "https://accounts.spotify.com/api/token"
+    url_hosts = ("open.spotify.com",)
+    TRACK_URL_PATTERN = re.compile(r"https?://open\.spotify\.com/(?:intl-[\w\-]+/)?track/(\w+)", flags=re.ASCII)
+    PLAYLIST_URL_PATTERN = re.compile(r"https?://open\.spotify\.com/(?:intl-[\w\-]+/)?playlist/(\w+)", flags=re.ASCII)
+    # The most ids the /tracks endpoint accepts at once
+    MAX_TRACK_IDS = 50
+    # How long single track lookups are collected before being sent off together, in seconds
+    TRACK_BATCH_WINDOW = 0.02
 
-    async def refresh_access_token(self):
-        if not self.should_update_token:
-            return
-        async with self.session.post(
-            "https://accounts.spotify.com/api/token",
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._track_batcher: MicroBatcher[str, UniversalTrack | None] = MicroBatcher(
+            self.tracks_from_ids,
+            window=self.TRACK_BATCH_WINDOW,
+            max_batch_size=self.MAX_TRACK_IDS,
+        )
+
+    async def fetch_access_token(self) -> tuple[str, float]:
+        async with self.request(
+            "POST",
+            self.TOKEN_URL,
+            authorize=False,
             data={
                 "grant_type": "client_credentials",
                 "client_id": self.client_id,
@@ -45,30 +64,53 @@ class SpotifyAPI(AbstractOAuthAPI, AbstractPlaylistAPI):
             data = await response.json()
             if data.get("error") == "invalid_client":
                 raise ValueError("Invalid spotify client id or secret")
-            self._token = data["access_token"]
-            self._token_expires_at = datetime.now() + timedelta(seconds=data["expires_in"])
+            return data["access_token"], data["expires_in"]
 
     def get_track_id(self, track_url: str) -> str:
-        if matches := re.match(r"https?://open\.spotify\.com/track/(\w+)", track_url, flags=re.ASCII):
+        if matches := self.TRACK_URL_PATTERN.match(track_url):
             return matches[1]
         else:
             raise InvalidURLError("Invalid Spotify track url")
 
+    @coalesce
     async def track_from_id(self, track_id: str) -> UniversalTrack | None:
-        async with self.session.get(
-            f"{self.API_BASE}/tracks/{track_id}",
-            headers={"Authorization": f"Bearer {self._token}"}
+        return await self._track_batcher.submit(track_id)
+
+    async def tracks_from_ids(self, track_ids: Sequence[str]) -> list[UniversalTrack | None]:
+        chunks = await asyncio.gather(*(
+            self._tracks_from_id_chunk(track_ids[i:i + self.MAX_TRACK_IDS])
+            for i in range(0, len(track_ids), self.MAX_TRACK_IDS)
+        ))
+        return [track for chunk in chunks for track in chunk]
+
+    async def _tracks_from_id_chunk(self, track_ids: Sequence[str]) -> list[UniversalTrack | None]:
+        async with self.request(
+            "GET",
+            f"{self.API_BASE}/tracks",
+            params={"ids": ",".join(track_ids)},
         ) as response:
             if response.status == 401:
                 raise RuntimeError("Invalid spotify token")
-            elif response.status != 200:
-                raise RuntimeError("Could not get track data")
-            return spotify_track_to_universal(await response.json())
+            elif response.status not in (200, 400):
+                raise TrackLookupError(f"Could not get track data ({response.status})")
+            tracks = (await response.json())["tracks"] if response.status == 200 else None
+
+        if tracks is None:
+            # A single malformed id fails the whole request, so look the ids up one by one to find it
+            if len(track_ids) == 1:
+                return [None]
+            return [
+                track
+                for chunk in await asyncio.gather(*(self._tracks_from_id_chunk([track_id]) for track_id in track_ids))
+                for track in chunk
+            ]
+        return [spotify_track_to_universal(track) if track else None for track in tracks]
 
+    @coalesce
     async def search_tracks(self, query: str) -> list[UniversalTrack] | None:
-        async with self.session.get(
+        async with self.request(
+            "GET",
             f"{self.API_BASE}/search",
-            headers={"Authorization": f"Bearer {self._token}"},
             params={"q": query, "type": "track"}
         ) as response:
             if response.status == 401:
@@ -80,15 +122,21 @@ class SpotifyAPI(AbstractOAuthAPI, AbstractPlaylistAPI):
         return [spotify_track_to_universal(track) for track in tracks]
 
     def get_playlist_id(self, playlist_url: str) -> str:
-        if matches := re.match(r"https?://open\.spotify\.com/playlist/(\w+)", playlist_url, flags=re.ASCII):
+        if matches := self.PLAYLIST_URL_PATTERN.match(playlist_url):
             return matches[1]
         else:
-            raise InvalidURLError("Invalid Spotify track url")
+            raise InvalidURLError("Invalid Spotify playlist url")
 
-    async def get_playlist_content(self, playlist_id: str) -> UniversalPlaylist | None:
-        async with self.session.get(
+    @coalesce
+    async def get_playlist_content(
+        self,
+        playlist_id: str,
+        *,
+        max_tracks: int | None = None,
+    ) -> UniversalPlaylist | None:
+        async with self.request(
+            "GET",
             f"{self.API_BASE}/playlists/{playlist_id}",
-            headers={"Authorization": f"Bearer {self._token}"}
         ) as response:
             if response.status == 401:
                 raise RuntimeError("Invalid spotify token")
@@ -99,12 +147,53 @@ class SpotifyAPI(AbstractOAuthAPI, AbstractPlaylistAPI):
         return UniversalPlaylist(
             name=playlist["name"],
             description=playlist.get("description"),
-            owner_names=[owner] if (owner := playlist["owner"].get("display_name")) else None,
+            owner_names=(owner,) if (owner := playlist["owner"].get("display_name")) else None,
             url=playlist["external_urls"]["spotify"],
             cover_url=playlist["images"][0]["url"],
-            tracks=[
-                spotify_track_to_universal(track["track"])
-                for track in playlist["tracks"]["items"]
-                if not track["is_local"] and track["track"].get("type") == "track"
-            ]
+            tracks=await self._collect_tracks(self._iter_playlist_pages(playlist["tracks"]), max_tracks=max_tracks),
+            track_count=playlist["tracks"].get("total"),
         )
+
+    async def get_playlist_version(self, playlist_id: str) -> str | None:
+        # Spotify gives every revision of a playlist its own snapshot id
+        async with self.request(
+            "GET",
+            f"{self.API_BASE}/playlists/{playlist_id}",
+            params={"fields": "snapshot_id"},
+        ) as response:
+            if response.status == 401:
+                raise RuntimeError("Invalid spotify token")
+            elif response.status != 200:
+                return None
+            return (await response.json()).get("snapshot_id")
+
+    async def iter_playlist_tracks(self, playlist_id: str) -> AsyncIterator[UniversalTrack]:
+        async with self.request(
+            "GET",
+            f"{self.API_BASE}/playlists/{playlist_id}/tracks",
+            params={"limit": 100},
+        ) as response:
+            if response.status == 401:
+                raise RuntimeError("Invalid spotify token")
+            elif response.status != 200:
+                return
+            first_page = await response.json()
+
+        async for track in self._iter_playlist_pages(first_page):
+            yield track
+
+    async def _iter_playlist_pages(self, page: dict) -> AsyncIterator[UniversalTrack]:
+        """Yields the tracks on a page of playlist items, then follows its ``next`` links through the following pages."""
+        while True:
+            for item in page["items"]:
+                if not item["is_local"] and (item.get("track") or {}).get("type") == "track":
+                    yield spotify_track_to_universal(item["track"])
+
+            if not page.get("next"):
+                return
+            async with self.request("GET", page["next"]) as response:
+                if response.status == 401:
+                    raise RuntimeError("Invalid spotify token")
+                elif response.status != 200:
+                    raise PlaylistIncompleteError(f"Could not fetch the next page of the playlist ({response.status})")
+                page = await response.json()
@@ -1,10 +1,10 @@
 import re
-
-# noinspection PyFromFutureImport
-from youtubesearchpython.__future__ import VideosSearch, Video, Playlist
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
 
 from ..abc import AbstractAPI, AbstractPlaylistAPI
-from ..errors import InvalidURLError
+from ..coalescing import coalesce
+from ..errors import InvalidURLError, PlaylistIncompleteError, TrackLookupError
 from ..universals import UniversalTrack, UniversalPlaylist
 
 
@@ -15,76 +15,177 @@ def get_best_thumbnail(thumbnails: list[dict]) -> dict:
     )
 
 
+def find_renderers(data: Any, renderer_name: str) -> Iterator[dict]:
+    """Yields every renderer with the given name in an innertube response, in the order they appear in."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key == renderer_name:
+                yield value
+            else:
+                yield from find_renderers(value, renderer_name)
+    elif isinstance(data, list):
+        for value in data:
+            yield from find_renderers(value, renderer_name)
+
+
+def get_text(text: dict | None) -> str:
+    if not text:
+        return ""
+    return text.get("simpleText") or "".join(run["text"] for run in text.get("runs", ()))
+
+
 def youtube_video_to_universal(video: dict) -> UniversalTrack:
+    """Converts a ``videoRenderer`` or ``playlistVideoRenderer`` from an innertube response."""
+    channel_name = get_text(video.get("ownerText") or video.get("shortBylineText") or video.get("longBylineText"))
+    return UniversalTrack(
+        title=get_text(video["title"]),
+        artist_names=(channel_name,) if channel_name else (),
+        url=f"https://www.youtube.com/watch?v={video['videoId']}",
+        cover_url=get_best_thumbnail(video["thumbnail"]["thumbnails"])["url"],
+    )
+
+
+def youtube_video_details_to_universal(video_details: dict) -> UniversalTrack:
+    """Converts the ``videoDetails`` of an innertube player response."""
     return UniversalTrack(
-        title=video["title"],
-        artist_names=[video["channel"]["name"]],
-        url=video["link"],
-        cover_url=get_best_thumbnail(video["thumbnails"])["url"],
+        title=video_details["title"],
+        artist_names=(video_details["author"],),
+        url=f"https://www.youtube.com/watch?v={video_details['videoId']}",
+        cover_url=get_best_thumbnail(video_details["thumbnail"]["thumbnails"])["url"],
     )
 
 
 class YoutubeAPI(AbstractAPI, AbstractPlaylistAPI):
+    INNERTUBE_BASE = "https://www.youtube.com/youtubei/v1"
+    INNERTUBE_CLIENT = {"clientName": "WEB", "clientVersion": "2.20240726.00.00", "hl": "en", "gl": "US"}
+    # The search filter for only returning videos
+    VIDEOS_ONLY_SEARCH_PARAMS = "EgIQAQ=="
+    url_hosts = ("youtube.com", "www.youtube.com", "music.youtube.com", "youtu.be")
+    TRACK_URL_PATTERN = re.compile(
+        r"""
+        ^(?:https?://)?             # optionaly matches "http://" or "https://"
+        (?:
+            (?:(?:www|music)\.)?    # optionaly the subdomains "www." or "music."
+            youtube\.com/watch\?v=  # matches "youtube.com/watch?v="
+            |
+            youtu\.be/              # matches "youtu.be/", but NOT with a subdomain
+        )([a-zA-Z0-9_\-]+)          # matches the video id
+        """,
+        flags=re.ASCII | re.VERBOSE,
+    )
+    PLAYLIST_URL_PATTERN = re.compile(
+        r"""
+        ^(?:https?://)?         # optionaly matches "http://" or "https://"
+        (?:(?:www|music)\.)?    # optionaly the subdomains "www." or "music."
+        youtube\.com/
+        playlist\?list=
+        ([a-zA-Z0-9_\-]+)       # matches the playlist id
+        """,
+        flags=re.ASCII | re.VERBOSE,
+    )
+
     def get_track_id(self, track_url: str) -> str:
-        if matches := re.match(
-            r"""
-            ^(?:https?://)?             # optionaly matches "http://" or "https://"
-            (?:
-                (?:(?:www|music)\.)?    # optionaly the subdomains "www." or "music."
-                youtube\.com/watch\?v=  # matches "youtube.com/watch?v="
-                |
-                youtu\.be/              # matches "youtu.be/", but NOT with a subdomain
-            )([a-zA-Z0-9_\-]+)          # matches the video id
-            """,
-            track_url,
-            flags=re.ASCII | re.VERBOSE,
-        ):
-            return matches[0]
+        if matches := self.TRACK_URL_PATTERN.match(track_url):
+            return matches[1]
         else:
             raise InvalidURLError("Invalid Youtube video url")
 
+    async def _innertube(self, endpoint: str, *, raise_on_error: bool = False, **payload) -> dict | None:
+        """Makes a request to YouTube's internal API over the shared session.
+
+        Returns None if the request fails, or raises :class:`TrackLookupError` instead if ``raise_on_error`` is set.
+        """
+        async with self.request(
+            "POST",
+            f"{self.INNERTUBE_BASE}/{endpoint}",
+            params={"prettyPrint": "false"},
+            json={"context": {"client": self.INNERTUBE_CLIENT}, **payload},
+        ) as response:
+            if response.status != 200:
+                if raise_on_error:
+                    raise TrackLookupError(f"YouTube answered {endpoint} with status {response.status}")
+                return None
+            return await response.json()
+
+    @coalesce
     async def track_from_id(self, track_id: str) -> UniversalTrack | None:
-        video = await Video.getInfo(track_id)
-        return youtube_video_to_universal(video)
+        # Videos that don't exist still get a 200, just without any details
+        data = await self._innertube("player", raise_on_error=True, videoId=track_id)
+        if "videoDetails" not in data:
+            return None
+        return youtube_video_details_to_universal(data["videoDetails"])
 
+    @coalesce
     async def search_tracks(self, query: str) -> list[UniversalTrack] | None:
-        videos = filter(
-            lambda vid: vid["type"] == "video",
-            (await VideosSearch(query).next())["result"],
-        )
-        return [youtube_video_to_universal(video) for video in videos]
+        data = await self._innertube("search", query=query, params=self.VIDEOS_ONLY_SEARCH_PARAMS)
+        if data is None:
+            return None
+        return [youtube_video_to_universal(video) for video in find_renderers(data, "videoRenderer")]
 
     def get_playlist_id(self, playlist_url: str) -> str:
-        if matches := re.match(
-            r"""
-            ^(?:https?://)?         # optionaly matches "http://" or "https://"
-            (?:(?:www|music)\.)?    # optionaly the subdomains "www." or "music."
-            youtube\.com/               
-            playlist\?list=
-            ([a-zA-Z0-9_\-]+)       # matches the playlist id
-            """,
-            playlist_url,
-            flags=re.ASCII | re.VERBOSE,
-        ):
+        if matches := self.PLAYLIST_URL_PATTERN.match(playlist_url):
             return matches[1]
         else:
             raise InvalidURLError("Invalid Youtube playlist url")
 
-    async def get_playlist_content(self, playlist_id: str) -> UniversalPlaylist | None:
-        # Only accepts a url so we fake it
-        # https://github.com/alexmercerind/youtube-search-python/blob/fc12c05747f1f7bd89d71699403762b86b523da5/youtubesearchpython/core/playlist.py#L88
-        playlist: dict = await Playlist.get(f"list={playlist_id}")
-        playlist_info = playlist["info"]
+    @coalesce
+    async def get_playlist_content(
+        self,
+        playlist_id: str,
+        *,
+        max_tracks: int | None = None,
+    ) -> UniversalPlaylist | None:
+        if (first_page := await self._innertube("browse", browseId=f"VL{playlist_id}")) is None:
+            return None
+        if (metadata := first_page.get("metadata", {}).get("playlistMetadataRenderer")) is None:
+            return None
 
+        tracks = await self._collect_tracks(self._iter_playlist_pages(first_page), max_tracks=max_tracks)
+        thumbnails = (
+            first_page.get("microformat", {}).get("microformatDataRenderer", {}).get("thumbnail", {}).get("thumbnails")
+        )
+        owner_name = next(
+            (get_text(header.get("ownerText")) for header in find_renderers(first_page, "playlistHeaderRenderer")),
+            None
+        )
         return UniversalPlaylist(
-            name=playlist_info["title"],
-            # There actually is no description, but if there was then this is where it'd be at
-            description=playlist_info.get("description"),
-            owner_names=[channel_name] if (channel_name := playlist_info.get("channel", {}).get("name")) else None,
-            url=playlist_info["link"],
-            cover_url=get_best_thumbnail(playlist_info["thumbnails"])["url"],
-            tracks=[
-                youtube_video_to_universal(video)
-                for video in playlist["videos"]
-            ]
-        )
\ No newline at end of file
+            name=metadata["title"],
+            description=metadata.get("description"),
+            owner_names=(owner_name,) if owner_name else None,
+            url=f"https://www.youtube.com/playlist?list={playlist_id}",
+            cover_url=(
+                get_best_thumbnail(thumbnails)["url"] if thumbnails
+                else tracks[0].cover_url if tracks
+                else None
+            ),
+            tracks=tracks,
+            # Every track was read unless it stopped at the limit
+            track_count=len(tracks) if max_tracks is None or len(tracks) < max_tracks else None,
+        )
+
+    async def iter_playlist_tracks(self, playlist_id: str) -> AsyncIterator[UniversalTrack]:
+        if (first_page := await self._innertube("browse", browseId=f"VL{playlist_id}")) is None:
+            return
+        async for track in self._iter_playlist_pages(first_page):
+            yield track
+
+    async def _iter_playlist_pages(self, page: dict) -> AsyncIterator[UniversalTrack]:
+        """Yields the videos in a browse response, then follows its continuation tokens through the following pages."""
+        while True:
+            for video in find_renderers(page, "playlistVideoRenderer"):
+                # Deleted and private videos have no title runs and can't be converted anyway
+                if video.get("isPlayable", True) and "videoId" in video:
+                    yield youtube_video_to_universal(video)
+
+            continuation = next(
+                (
+                    item["continuationEndpoint"]["continuationCommand"]["token"]
+                    for item in find_renderers(page, "continuationItemRenderer")
+                    if "continuationCommand" in item.get("continuationEndpoint", {})
+                ),
+                None,
+            )
+            if continuation is None:
+                return
+            if (page := await self._innertube("browse", continuation=continuation)) is None:
+                raise PlaylistIncompleteError("Could not fetch the next page of the playlist")
@@ -1,23 +1,30 @@
+import dataclasses
 import re
 
 from .youtube import YoutubeAPI
+from ..coalescing import coalesce
 from ..errors import InvalidURLError
 from ..universals import UniversalTrack
 
 
 class YoutubeMusicAPI(YoutubeAPI):
+    url_hosts = ("music.youtube.com",)
+    TRACK_URL_PATTERN = re.compile(r"^(?:https?://)?music\.youtube\.com/watch\?v=([a-zA-Z0-9_\-]+)", flags=re.ASCII)
+
     def get_track_id(self, track_url: str) -> str:
-        if matches := re.match(
-            r"^(?:https?://)?music\.youtube\.com/watch\?v=([a-zA-Z0-9_\-]+)",
-            track_url,
-            flags=re.ASCII,
-        ):
-            return matches[0]
+        if matches := self.TRACK_URL_PATTERN.match(track_url):
+            return matches[1]
         else:
             raise InvalidURLError("Invalid Youtube Music url")
 
+    @coalesce
     async def search_tracks(self, query: str) -> list[UniversalTrack] | None:
-        tracks = await super().search_tracks(query)
-        for track in tracks:
-            track.url = re.sub(r"^https?://(www\.)?(youtu\.be|youtube.[a-z]+)", "^https://music.youtube.com", track.url)
-        return tracks
+        if (tracks := await super().search_tracks(query)) is None:
+            return None
+        return [
+            dataclasses.replace(
+                track,
+                url=re.sub(r"^https?://(www\.)?(youtu\.be|youtube.[a-z]+)", "https://music.youtube.com", track.url),
+            )
+            for track in tracks
+        ]
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import discord
+
+__all__ = [
+    "ConversionProgress",
+]
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(round(seconds), 60)
+    return f"{minutes}m {seconds}s" if minutes else f"{seconds}s"
+
+
+class ConversionProgress:
+    """Keeps a single status message up to date while the tracks of a playlist are being converted.
+
+    Edits are throttled to at most one per ``edit_interval`` seconds, no matter how quickly tracks finish.
+    """
+
+    def __init__(self, *, title: str, edit_interval: float):
+        self.title = title
+        self.edit_interval = edit_interval
+        self.message: discord.Message | None = None
+        self.total: int | None = None
+        self.queued = 0
+        self.results: dict[int, str | None] = {}
+        self._started_at = time.monotonic()
+        self._last_edit_at = 0.0
+        self._edit_task: asyncio.Task | None = None
+
+    @property
+    def completed(self) -> int:
+        return len(self.results)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started_at
+
+    @property
+    def throughput(self) -> float:
+        """Tracks converted per second so far."""
+        return self.completed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def render(self) -> str:
+        found = sum(1 for url in self.results.values() if url)
+        status = f"{self.completed}/{self.total if self.total is not None else f'{self.queued}+'} tracks converted"
+        status += f" ({found} found)"
+        if self.completed:
+            status += f" • {self.throughput:.1f} tracks/s"
+            if self.total is not None and (throughput := self.throughput) > 0:
+                status += f" • ETA {_format_duration((self.total - self.completed) / throughput)}"
+
+        content = f"# {self.title}\n{status}\n\n"
+        # Only the tracks before the first one that is still being converted, so that numbering stays in order
+        index = 0
+        while index in self.results:
+            url = self.results[index]
+            line = f"{index + 1}. {f'<{url}>' if url else 'Could not be found'}\n"
+            if len(content) + len(line) >= 2000:
+                break
+            content += line
+            index += 1
+        return content
+
+    def track_queued(self) -> None:
+        self.queued += 1
+
+    def all_queued(self) -> None:
+        self.total = self.queued
+        self._schedule_edit()
+
+    def track_converted(self, index: int, converted_url: str | None) -> None:
+        self.results[index] = converted_url
+        self._schedule_edit()
+
+    def _schedule_edit(self) -> None:
+        if self.message is None or (self._edit_task is not None and not self._edit_task.done()):
+            return
+        self._edit_task = asyncio.create_task(self._edit())
+
+    async def _edit(self) -> None:
+        await asyncio.sleep(max(0.0, self._last_edit_at + self.edit_interval - time.monotonic()))
+        self._last_edit_at = time.monotonic()
+        try:
+            await self.message.edit(content=self.render())
+        except discord.HTTPException:
+            pass
+
+    async def finish(self, content: str, *, file: discord.File | None = None) -> None:
+        """Replaces the status with the final content, cancelling any update that has not been sent yet."""
+        if self._edit_task is not None:
+            self._edit_task.cancel()
+        await self.message.edit(content=content, attachments=[file] if file else [])
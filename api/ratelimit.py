@@ -0,0 +1,88 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+__all__ = [
+    "TokenBucket",
+    "parse_retry_after",
+    "backoff_delay",
+]
+
+
+class TokenBucket:
+    """Allows ``rate`` requests per second on average, with bursts of up to ``capacity`` requests.
+
+    A rate of zero or less disables the limit entirely.
+    """
+
+    def __init__(self, *, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if now <= self._updated_at:
+            return
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    @property
+    def remaining(self) -> float:
+        """How many requests can currently be made without waiting."""
+        if self.rate <= 0:
+            return float("inf")
+        if time.monotonic() < self._blocked_until:
+            return 0.0
+        self._refill()
+        return self._tokens
+
+    async def acquire(self) -> None:
+        # The lock makes waiters take their turn in the order they arrived
+        async with self._lock:
+            while True:
+                if (blocked_for := self._blocked_until - time.monotonic()) > 0:
+                    await asyncio.sleep(blocked_for)
+                    continue
+                if self.rate <= 0:
+                    return
+
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def block_for(self, seconds: float) -> None:
+        """Stops anyone from acquiring a token for the given amount of time, e.g. after being told to back off."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        # Only let a single request through once the wait is over, the rest has to refill as usual
+        self._tokens = 1.0
+        self._updated_at = max(self._updated_at, self._blocked_until)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Converts a ``Retry-After`` header, which is either a number of seconds or an HTTP date, into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, *, base: float = 0.5, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(base, min(cap, base * 2 ** attempt))
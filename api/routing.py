@@ -0,0 +1,60 @@
+import urllib.parse
+from collections.abc import Callable, Collection
+from typing import Literal
+
+from .abc import AbstractPlaylistAPI
+from .errors import InvalidURLError
+from .types import APIInterface
+
+__all__ = [
+    "URLRouter",
+]
+
+URLKind = Literal["track", "playlist"]
+
+
+class URLRouter:
+    """Finds out which platform a url belongs to by looking at its hostname, instead of trying every platform.
+
+    Only the id extractors of platforms that claim the url's host are ever run.
+    """
+
+    def __init__(self, api_interfaces: dict[str, APIInterface]):
+        self._routes: dict[str, list[tuple[str, URLKind, Callable[[str], str]]]] = {}
+        self._platform_hosts: dict[str, frozenset[str]] = {}
+        for platform_name, api_interface in api_interfaces.items():
+            self._platform_hosts[platform_name] = frozenset(host.lower() for host in api_interface.url_hosts)
+            extractors: list[tuple[URLKind, Callable[[str], str]]] = [("track", api_interface.get_track_id)]
+            if isinstance(api_interface, AbstractPlaylistAPI):
+                extractors.append(("playlist", api_interface.get_playlist_id))
+
+            for host in api_interface.url_hosts:
+                routes = self._routes.setdefault(host.lower(), [])
+                routes.extend((platform_name, kind, extractor) for kind, extractor in extractors)
+
+    @property
+    def hosts(self) -> frozenset[str]:
+        return frozenset(self._routes)
+
+    def hosts_for(self, platform_names: Collection[str]) -> frozenset[str]:
+        """The hosts claimed by any of the given platforms."""
+        return frozenset().union(*(self._platform_hosts.get(name, ()) for name in platform_names))
+
+    def resolve(self, url: str, *, skip: Collection[str] = ()) -> tuple[str, URLKind, str] | None:
+        """Returns the platform name, the kind of url and the id it points to, or None if no platform handles it.
+
+        Platforms in ``skip`` are not considered.
+        """
+        try:
+            host = urllib.parse.urlsplit(url if "://" in url else f"https://{url}").hostname
+        except ValueError:
+            return None
+
+        for platform_name, kind, extractor in self._routes.get(host, ()):
+            if platform_name in skip:
+                continue
+            try:
+                return platform_name, kind, extractor(url)
+            except InvalidURLError:
+                continue
+        return None
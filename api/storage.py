@@ -0,0 +1,229 @@
+import asyncio
+import contextlib
+import json
+import sqlite3
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import TypeVar
+
+from .jobs import ACTIVE_JOB_STATUSES, PlaylistJob, PlaylistSnapshot
+
+__all__ = [
+    "TrackMappingStore",
+    "PlaylistJobStore",
+]
+
+_T = TypeVar("_T")
+
+
+async def _in_thread(function: Callable[[], _T]) -> _T:
+    """Runs ``function`` in a worker thread, waiting for it to finish even if the caller is cancelled.
+
+    Otherwise a cancelled caller would give up the store's lock while the thread is still using the connection.
+    """
+    task = asyncio.ensure_future(asyncio.to_thread(function))
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        while not task.done():
+            with contextlib.suppress(asyncio.CancelledError):
+                await asyncio.shield(task)
+        raise
+
+
+class _SQLiteStore:
+    """A SQLite database whose access all happens in a worker thread, so that it never blocks the event loop."""
+
+    # Run on every connection to create the tables if they don't exist yet
+    SCHEMA = ""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._connection: sqlite3.Connection | None = None
+        self._lock = asyncio.Lock()
+
+    async def open(self) -> None:
+        self._connection = await _in_thread(self._connect)
+
+    async def close(self) -> None:
+        if self._connection is None:
+            return
+        async with self._lock:
+            await _in_thread(self._connection.close)
+            self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(self.SCHEMA)
+        connection.commit()
+        return connection
+
+    async def _execute(self, query: str, parameters: tuple, result: Callable[[sqlite3.Cursor], _T], default: _T) -> _T:
+        """Runs a query and commits it, returning what ``result`` makes of its cursor, or ``default`` if closed."""
+        async with self._lock:
+            if self._connection is None:
+                return default
+
+            def run() -> _T:
+                cursor = self._connection.execute(query, parameters)
+                value = result(cursor)
+                self._connection.commit()
+                return value
+
+            return await _in_thread(run)
+
+    async def _run(self, query: str, parameters: tuple = (), *, fetch: bool = False) -> list[tuple]:
+        return await self._execute(query, parameters, lambda cursor: cursor.fetchall() if fetch else [], [])
+
+    async def _delete(self, query: str, parameters: tuple = ()) -> int:
+        """Runs a query that deletes rows and returns how many it deleted."""
+        return await self._execute(query, parameters, lambda cursor: cursor.rowcount, 0)
+
+
+class TrackMappingStore(_SQLiteStore):
+    """Persists which track on one platform was converted to which url on another platform."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS track_mappings (
+            source_platform TEXT NOT NULL,
+            source_id TEXT NOT NULL,
+            target_platform TEXT NOT NULL,
+            target_url TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (source_platform, source_id, target_platform)
+        );
+        CREATE INDEX IF NOT EXISTS track_mappings_updated_at ON track_mappings (updated_at);
+    """
+
+    def __init__(self, path: Path, *, ttl: float):
+        super().__init__(path)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, source_platform: str, source_id: str, target_platform: str) -> str | None:
+        rows = await self._run(
+            "SELECT target_url FROM track_mappings "
+            "WHERE source_platform = ? AND source_id = ? AND target_platform = ? AND updated_at > ?",
+            (source_platform, source_id, target_platform, time.time() - self.ttl),
+            fetch=True,
+        )
+        if not rows:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return rows[0][0]
+
+    async def set(self, source_platform: str, source_id: str, target_platform: str, target_url: str) -> None:
+        await self._run(
+            "INSERT OR REPLACE INTO track_mappings VALUES (?, ?, ?, ?, ?)",
+            (source_platform, source_id, target_platform, target_url, time.time()),
+        )
+
+    async def recent(self, limit: int) -> list[tuple[str, str, str, str]]:
+        """Returns the most recently stored mappings that have not expired yet, newest first."""
+        return await self._run(
+            "SELECT source_platform, source_id, target_platform, target_url FROM track_mappings "
+            "WHERE updated_at > ? ORDER BY updated_at DESC LIMIT ?",
+            (time.time() - self.ttl, limit),
+            fetch=True,
+        )
+
+    async def compact(self) -> int:
+        """Deletes all expired mappings and returns how many were removed."""
+        deleted = await self._delete("DELETE FROM track_mappings WHERE updated_at <= ?", (time.time() - self.ttl,))
+        if deleted:
+            await self._run("PRAGMA optimize")
+        return deleted
+
+
+class PlaylistJobStore(_SQLiteStore):
+    """Persists background playlist conversion jobs and their progress, so they can be resumed after a restart.
+
+    Also keeps a snapshot of the last finished conversion of every playlist, for converting it again incrementally.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS playlist_jobs (
+            id TEXT PRIMARY KEY,
+            guild_id INTEGER,
+            status TEXT NOT NULL,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS playlist_jobs_status ON playlist_jobs (status, updated_at);
+        CREATE TABLE IF NOT EXISTS playlist_snapshots (
+            source_platform TEXT NOT NULL,
+            playlist_id TEXT NOT NULL,
+            target_platform TEXT NOT NULL,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (source_platform, playlist_id, target_platform)
+        );
+        CREATE INDEX IF NOT EXISTS playlist_snapshots_updated_at ON playlist_snapshots (updated_at);
+    """
+
+    async def save(self, job: PlaylistJob) -> None:
+        await self._run(
+            "INSERT OR REPLACE INTO playlist_jobs VALUES (?, ?, ?, ?, ?)",
+            (job.id, job.guild_id, job.status, json.dumps(job.to_dict(), separators=(",", ":")), time.time()),
+        )
+
+    async def get(self, job_id: str) -> PlaylistJob | None:
+        rows = await self._run("SELECT data FROM playlist_jobs WHERE id = ?", (job_id,), fetch=True)
+        return PlaylistJob.from_dict(json.loads(rows[0][0])) if rows else None
+
+    async def active(self) -> list[PlaylistJob]:
+        """Returns every job that is queued or running, oldest first."""
+        rows = await self._run(
+            f"SELECT data FROM playlist_jobs WHERE status IN ({', '.join('?' * len(ACTIVE_JOB_STATUSES))}) "
+            "ORDER BY updated_at",
+            ACTIVE_JOB_STATUSES,
+            fetch=True,
+        )
+        return [PlaylistJob.from_dict(json.loads(data)) for data, in rows]
+
+    async def get_snapshot(
+        self,
+        source_platform: str,
+        playlist_id: str,
+        target_platform: str,
+    ) -> PlaylistSnapshot | None:
+        rows = await self._run(
+            "SELECT data FROM playlist_snapshots WHERE source_platform = ? AND playlist_id = ? AND target_platform = ?",
+            (source_platform, playlist_id, target_platform),
+            fetch=True,
+        )
+        return PlaylistSnapshot.from_dict(json.loads(rows[0][0])) if rows else None
+
+    async def save_snapshot(
+        self,
+        source_platform: str,
+        playlist_id: str,
+        target_platform: str,
+        snapshot: PlaylistSnapshot,
+    ) -> None:
+        await self._run(
+            "INSERT OR REPLACE INTO playlist_snapshots VALUES (?, ?, ?, ?, ?)",
+            (
+                source_platform,
+                playlist_id,
+                target_platform,
+                json.dumps(snapshot.to_dict(), separators=(",", ":")),
+                snapshot.updated_at,
+            ),
+        )
+
+    async def remove_snapshots(self, older_than: float) -> int:
+        """Deletes snapshots last saved more than ``older_than`` seconds ago and returns how many were removed."""
+        return await self._delete("DELETE FROM playlist_snapshots WHERE updated_at <= ?", (time.time() - older_than,))
+
+    async def remove_finished(self, older_than: float) -> int:
+        """Deletes jobs that ended more than ``older_than`` seconds ago and returns how many were removed."""
+        return await self._delete(
+            f"DELETE FROM playlist_jobs WHERE status NOT IN ({', '.join('?' * len(ACTIVE_JOB_STATUSES))}) "
+            "AND updated_at <= ?",
+            (*ACTIVE_JOB_STATUSES, time.time() - older_than),
+        )
@@ -0,0 +1,145 @@
+import contextlib
+import contextvars
+import time
+from collections.abc import Iterator
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+
+__all__ = [
+    "Span",
+    "Trace",
+    "start_trace",
+    "span",
+    "create_trace_config",
+]
+
+
+class Span:
+    __slots__ = ("name", "start", "duration", "attributes")
+
+    def __init__(self, name: str, start: float, duration: float, attributes: dict[str, Any]):
+        self.name = name
+        # Seconds since the trace started
+        self.start = start
+        self.duration = duration
+        self.attributes = attributes
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "start_ms": round(self.start * 1000, 2),
+            "duration_ms": round(self.duration * 1000, 2),
+            **self.attributes,
+        }
+
+
+class Trace:
+    """The timed stages of a single conversion, including the HTTP requests made for it."""
+
+    def __init__(self, name: str, **attributes: Any):
+        self.name = name
+        self.attributes = attributes
+        self.spans: list[Span] = []
+        self.started_at = time.perf_counter()
+        self.duration: float | None = None
+
+    def add_span(self, name: str, started_at: float, duration: float, **attributes: Any) -> None:
+        self.spans.append(Span(name, started_at - self.started_at, duration, attributes))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            **self.attributes,
+            "duration_ms": round(self.duration * 1000, 2) if self.duration is not None else None,
+            "spans": [span.to_dict() for span in sorted(self.spans, key=lambda span: span.start)],
+        }
+
+
+# The trace of the conversion the current task is working on, copied into any tasks it starts
+_current_trace: contextvars.ContextVar[Trace | None] = contextvars.ContextVar("current_trace", default=None)
+
+
+@contextlib.contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Trace]:
+    """Traces everything done inside the block, and in tasks started from it."""
+    trace = Trace(name, **attributes)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        trace.duration = time.perf_counter() - trace.started_at
+        _current_trace.reset(token)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    """Times a stage of the current trace, doing nothing if nothing is being traced."""
+    if (trace := _current_trace.get()) is None:
+        yield
+        return
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(name, started_at, time.perf_counter() - started_at, **attributes)
+
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    """Adds the DNS lookup, connection and time to first byte of every request to the current trace as spans."""
+    trace_config = aiohttp.TraceConfig()
+
+    def timer(name: str, start_attribute: str):
+        async def on_start(_, context: SimpleNamespace, params) -> None:
+            setattr(context, start_attribute, time.perf_counter())
+
+        async def on_end(_, context: SimpleNamespace, params) -> None:
+            if (trace := context.trace) is None or (started_at := getattr(context, start_attribute, None)) is None:
+                return
+            attributes = {"host": params.host} if hasattr(params, "host") else {}
+            trace.add_span(name, started_at, time.perf_counter() - started_at, **attributes)
+
+        return on_start, on_end
+
+    async def on_request_start(_, context: SimpleNamespace, params: aiohttp.TraceRequestStartParams) -> None:
+        context.trace = _current_trace.get()
+        context.request_started_at = time.perf_counter()
+
+    async def on_request_end(_, context: SimpleNamespace, params: aiohttp.TraceRequestEndParams) -> None:
+        # Fired once the response headers have arrived, so this is the time to first byte
+        if context.trace is not None:
+            context.trace.add_span(
+                "http",
+                context.request_started_at,
+                time.perf_counter() - context.request_started_at,
+                method=params.method,
+                host=params.url.host,
+                status=params.response.status,
+            )
+
+    async def on_request_exception(_, context: SimpleNamespace, params: aiohttp.TraceRequestExceptionParams) -> None:
+        if context.trace is not None:
+            context.trace.add_span(
+                "http",
+                context.request_started_at,
+                time.perf_counter() - context.request_started_at,
+                method=params.method,
+                host=params.url.host,
+                error=repr(params.exception),
+            )
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+
+    for name, start_signal, end_signal in (
+        ("connection_pool_wait", trace_config.on_connection_queued_start, trace_config.on_connection_queued_end),
+        ("connect", trace_config.on_connection_create_start, trace_config.on_connection_create_end),
+        ("dns", trace_config.on_dns_resolvehost_start, trace_config.on_dns_resolvehost_end),
+    ):
+        on_start, on_end = timer(name, f"{name}_started_at")
+        start_signal.append(on_start)
+        end_signal.append(on_end)
+
+    return trace_config
@@ -0,0 +1,35 @@
+import aiohttp
+
+__all__ = [
+    "create_session",
+    "client_timeout",
+]
+
+
+def client_timeout(*, connect: float, read: float, total: float) -> aiohttp.ClientTimeout:
+    """Builds a timeout from settings, where 0 means no limit."""
+    return aiohttp.ClientTimeout(
+        total=total or None,
+        sock_connect=connect or None,
+        sock_read=read or None,
+    )
+
+
+def create_session(
+    *,
+    limit: int,
+    limit_per_host: int,
+    keepalive_timeout: float,
+    dns_cache_ttl: int,
+    timeout: aiohttp.ClientTimeout,
+    trace_configs: list[aiohttp.TraceConfig] | None = None,
+) -> aiohttp.ClientSession:
+    """Creates the session shared by every platform, with a connection pool sized by the given limits (0 for none)."""
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        use_dns_cache=dns_cache_ttl > 0,
+        ttl_dns_cache=dns_cache_ttl or None,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=trace_configs)
@@ -1,21 +1,39 @@
+import dataclasses
 import datetime
+import functools
+import json
+import sys
+from typing import Any
 
+__all__ = [
+    "UniversalAlbum",
+    "UniversalTrack",
+    "UniversalPlaylist",
+    "CODEC_VERSION",
+    "encode",
+    "decode",
+]
 
+# Bumped whenever the encoded format changes in a way older versions can't read
+CODEC_VERSION = 1
+
+
+@functools.lru_cache(maxsize=4096)
+def _intern_names(names: tuple[str, ...]) -> tuple[str, ...]:
+    # lru_cache hands back the first equal tuple it saw, so tracks by the same artists share one tuple
+    return tuple(map(sys.intern, names))
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
 class UniversalAlbum:
-    def __init__(
-        self,
-        *,
-        title: str,
-        artist_names: list[str],
-        url: str,
-        release_date: datetime.datetime | None = None,
-        cover_url: str | None = None,
-    ):
-        self.title = title
-        self.artist_names = artist_names
-        self.url = url
-        self.cover_url = cover_url
-        self.release_date = release_date
+    title: str
+    artist_names: tuple[str, ...]
+    url: str
+    release_date: datetime.datetime | str | None = None
+    cover_url: str | None = None
+
+    def __post_init__(self):
+        object.__setattr__(self, "artist_names", _intern_names(tuple(self.artist_names)))
 
     def __str__(self):
         return f"{self.title} by {', '.join(self.artist_names)}"
@@ -31,22 +49,43 @@ class UniversalAlbum:
             f">"
         )
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "title": self.title,
+            "artist_names": list(self.artist_names),
+            "url": self.url,
+            "release_date": (
+                {"datetime": self.release_date.isoformat()}
+                if isinstance(self.release_date, datetime.datetime)
+                else self.release_date
+            ),
+            "cover_url": self.cover_url,
+        }
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "UniversalAlbum":
+        release_date = data.get("release_date")
+        if isinstance(release_date, dict):
+            release_date = datetime.datetime.fromisoformat(release_date["datetime"])
+        return cls(
+            title=data["title"],
+            artist_names=data["artist_names"],
+            url=data["url"],
+            release_date=release_date,
+            cover_url=data.get("cover_url"),
+        )
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
 class UniversalTrack:
-    def __init__(
-        self,
-        *,
-        title: str,
-        artist_names: list[str],
-        url: str,
-        cover_url: str | None = None,
-        album: UniversalAlbum | None = None,
-    ):
-        self.title = title
-        self.artist_names = artist_names
-        self.url = url
-        self.album = album
-        self.cover_url = cover_url
+    title: str
+    artist_names: tuple[str, ...]
+    url: str
+    cover_url: str | None = None
+    album: UniversalAlbum | None = None
+
+    def __post_init__(self):
+        object.__setattr__(self, "artist_names", _intern_names(tuple(self.artist_names)))
 
     def __str__(self):
         return f"{self.title} by {', '.join(self.artist_names)}"
@@ -62,27 +101,45 @@ class UniversalTrack:
             f">"
         )
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "title": self.title,
+            "artist_names": list(self.artist_names),
+            "url": self.url,
+            "cover_url": self.cover_url,
+            "album": self.album.to_dict() if self.album else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "UniversalTrack":
+        return cls(
+            title=data["title"],
+            artist_names=data["artist_names"],
+            url=data["url"],
+            cover_url=data.get("cover_url"),
+            album=UniversalAlbum.from_dict(album) if (album := data.get("album")) else None,
+        )
+
 
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
 class UniversalPlaylist:
-    def __init__(
-        self,
-        *,
-        name: str,
-        description: str | None,
-        owner_names: list[str] | None,
-        url: str,
-        tracks: list[UniversalTrack],
-        cover_url: str | None = None,
-    ):
-        self.name = name
-        self.description = description
-        self.owner_names = owner_names
-        self.url = url
-        self.tracks = tracks
-        self.cover_url = cover_url
+    name: str
+    description: str | None
+    owner_names: tuple[str, ...] | None
+    url: str
+    tracks: tuple[UniversalTrack, ...]
+    cover_url: str | None = None
+    # How many tracks the whole playlist has, since ``tracks`` may only be the first few of them
+    # None if the platform doesn't say
+    track_count: int | None = None
+
+    def __post_init__(self):
+        if self.owner_names is not None:
+            object.__setattr__(self, "owner_names", _intern_names(tuple(self.owner_names)))
+        object.__setattr__(self, "tracks", tuple(self.tracks))
 
     def __str__(self):
-        return f"Playlist {self.name} by {', '.join(self.owner_names)}"
+        return f"Playlist {self.name} by {', '.join(self.owner_names or ())}"
 
     def __repr__(self):
         return (
@@ -92,5 +149,56 @@ class UniversalPlaylist:
             f" url={self.url!r}"
             f" tracks={self.tracks!r}"
             f" cover_url={self.cover_url!r}"
+            f" track_count={self.track_count!r}"
             f">"
         )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "owner_names": list(self.owner_names) if self.owner_names is not None else None,
+            "url": self.url,
+            "tracks": [track.to_dict() for track in self.tracks],
+            "cover_url": self.cover_url,
+            "track_count": self.track_count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "UniversalPlaylist":
+        return cls(
+            name=data["name"],
+            description=data.get("description"),
+            owner_names=data.get("owner_names"),
+            url=data["url"],
+            tracks=tuple(map(UniversalTrack.from_dict, data["tracks"])),
+            cover_url=data.get("cover_url"),
+            track_count=data.get("track_count"),
+        )
+
+
+_CODEC_TYPES: dict[str, type[UniversalAlbum | UniversalTrack | UniversalPlaylist]] = {
+    "album": UniversalAlbum,
+    "track": UniversalTrack,
+    "playlist": UniversalPlaylist,
+}
+
+
+def encode(item: UniversalAlbum | UniversalTrack | UniversalPlaylist | list[UniversalTrack]) -> bytes:
+    """Encodes a universal object, or a list of tracks, into compact versioned JSON."""
+    if isinstance(item, list):
+        payload = {"v": CODEC_VERSION, "type": "tracks", "data": [track.to_dict() for track in item]}
+    else:
+        type_name = next(name for name, cls in _CODEC_TYPES.items() if isinstance(item, cls))
+        payload = {"v": CODEC_VERSION, "type": type_name, "data": item.to_dict()}
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def decode(data: bytes | str) -> UniversalAlbum | UniversalTrack | UniversalPlaylist | list[UniversalTrack]:
+    """The inverse of :func:`encode`. Raises ValueError for data written by an unknown codec version."""
+    payload = json.loads(data)
+    if payload.get("v") != CODEC_VERSION:
+        raise ValueError(f"Unsupported universal codec version {payload.get('v')!r}")
+    if payload["type"] == "tracks":
+        return [UniversalTrack.from_dict(track) for track in payload["data"]]
+    return _CODEC_TYPES[payload["type"]].from_dict(payload["data"])
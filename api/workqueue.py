@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Generic, Literal, TypeVar
+
+__all__ = [
+    "BoundedWorkQueue",
+    "OverflowPolicy",
+]
+
+_T = TypeVar("_T")
+OverflowPolicy = Literal["drop_oldest", "skip"]
+
+
+class BoundedWorkQueue(Generic[_T]):
+    """A fixed pool of workers handling items from a queue of limited size.
+
+    When the queue is full, ``overflow`` decides whether the oldest waiting item is dropped to make room for the
+    new one (``"drop_oldest"``), or the new item is not queued at all (``"skip"``).
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[_T], Awaitable[None]],
+        *,
+        max_size: int,
+        workers: int,
+        overflow: OverflowPolicy,
+        logger: logging.Logger,
+    ):
+        if overflow not in ("drop_oldest", "skip"):
+            raise ValueError(f"Unknown overflow policy {overflow!r}")
+        self.handler = handler
+        self.worker_count = workers
+        self.overflow = overflow
+        self.logger = logger
+        self.dropped = 0
+        self._queue: asyncio.Queue[_T] = asyncio.Queue(maxsize=max_size)
+        self._workers: list[asyncio.Task] = []
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.worker_count)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def join(self) -> None:
+        """Waits until every queued item has been handled."""
+        await self._queue.join()
+
+    def put(self, item: _T) -> bool:
+        """Queues an item without waiting, returning whether it was queued."""
+        if self._queue.full():
+            self.dropped += 1
+            if self.overflow == "skip":
+                return False
+            self._queue.get_nowait()
+            self._queue.task_done()
+        self._queue.put_nowait(item)
+        return True
+
+    async def _work(self) -> None:
+        while True:
+            item = await self._queue.get()
+            try:
+                await self.handler(item)
+            except Exception:
+                self.logger.exception(f"Failed to handle {item!r}")
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,287 @@
+"""End-to-end load test of the converter against the local stub platform servers.
+
+Replays synthetic Discord messages through the real PlatformConverter cog at a set rate, then reports how many
+messages per second it kept up with and the latency from message to reply. Optionally converts a large playlist
+afterwards, to see what playlist_convert costs:
+
+    python benchmarks/load.py --messages 2000 --rate 100 --playlist-tracks 500
+    python benchmarks/load.py --latency 0.2 --error-rate 0.05 --rate-limit-rate 0.01
+"""
+import argparse
+import asyncio
+import importlib
+import itertools
+import json
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tomllib
+from pathlib import Path
+from types import SimpleNamespace
+
+import breadcord
+
+from stub_servers import StubBehaviour, StubServers
+
+MODULE_PATH = Path(__file__).resolve().parent.parent
+
+# The module uses relative imports, so it has to be imported as a package from the folder it is in
+sys.path.insert(0, str(MODULE_PATH.parent))
+converter = importlib.import_module(MODULE_PATH.name)
+
+platforms = converter.api.platforms
+
+
+def settings_from_schema(overrides: dict) -> SimpleNamespace:
+    """The module's default settings with some replaced, shaped like breadcord's settings (``settings.key.value``)."""
+    with open(MODULE_PATH / "settings_schema.toml", "rb") as file:
+        schema = tomllib.load(file)
+
+    def merge(defaults: dict, replacements: dict) -> dict:
+        merged = dict(defaults)
+        for key, value in replacements.items():
+            merged[key] = merge(defaults.get(key, {}), value) if isinstance(value, dict) else value
+        return merged
+
+    def wrap(values: dict) -> SimpleNamespace:
+        return SimpleNamespace(**{
+            key: wrap(value) if isinstance(value, dict) else SimpleNamespace(value=value)
+            for key, value in values.items()
+        })
+
+    return wrap(merge(schema, overrides))
+
+
+class HarnessBot:
+    def __init__(self):
+        self.tree = SimpleNamespace(add_command=lambda *args, **kwargs: None)
+
+    async def is_owner(self, _) -> bool:
+        return True
+
+
+class HarnessModuleCog(breadcord.module.ModuleCog):
+    """Stands in for the parts of a loaded breadcord module that the cog uses, so it can run without a bot."""
+
+    def __init__(self, module_id: str):
+        pass
+
+    @property
+    def settings(self):
+        return self._harness_settings
+
+    @property
+    def module(self):
+        return self._harness_module
+
+    @property
+    def logger(self):
+        return self._harness_logger
+
+    @property
+    def bot(self):
+        return self._harness_bot
+
+
+class HarnessConverter(converter.PlatformConverter, HarnessModuleCog):
+    def __init__(self, *, settings: SimpleNamespace, storage_path: Path, stub_url: str):
+        self._harness_settings = settings
+        self._harness_module = SimpleNamespace(id="platform_converter", storage_path=storage_path)
+        self._harness_logger = logging.getLogger("platform_converter.load")
+        self._harness_bot = HarnessBot()
+        super().__init__("platform_converter")
+
+        # Point every platform at the stub servers instead of the real services
+        self.api_interfaces.update({
+            "spotify": type("SpotifyAPI", (platforms.SpotifyAPI,), {
+                "API_BASE": f"{stub_url}/spotify/v1",
+                "TOKEN_URL": f"{stub_url}/spotify/token",
+            }),
+            "youtube": type("YoutubeAPI", (platforms.YoutubeAPI,), {"INNERTUBE_BASE": f"{stub_url}/youtube"}),
+            "youtube_music": type("YoutubeMusicAPI", (platforms.YoutubeMusicAPI,), {
+                "INNERTUBE_BASE": f"{stub_url}/youtube",
+            }),
+            "beatsaver": type("BeatSaverAPI", (platforms.BeatSaverAPI,), {"api_base": f"{stub_url}/beatsaver"}),
+        })
+
+
+class SyntheticMessage:
+    _ids = itertools.count(1)
+
+    def __init__(self, content: str, *, channel_id: int):
+        self.id = next(self._ids)
+        self.content = content
+        self.author = SimpleNamespace(bot=False)
+        self.channel = SimpleNamespace(id=channel_id)
+        self.sent_at: float | None = None
+        self.replied_at: float | None = None
+
+    async def reply(self, content: str, **_) -> SimpleNamespace:
+        self.replied_at = time.perf_counter()
+        return SimpleNamespace(jump_url=f"https://discord.com/channels/0/{self.channel.id}/{self.id}")
+
+
+def synthetic_messages(count: int, *, stub_url: str, repeat_ratio: float, channels: int) -> list[SyntheticMessage]:
+    """Messages linking tracks on the platforms that get auto converted, some of them to already seen tracks."""
+    url_templates = [
+        "https://open.spotify.com/track/{}",
+        "https://open.spotify.com/intl-de/track/{}?si=0123456789abcdef",
+        f"{stub_url}/invidious/watch?v={{}}",
+        "https://beatsaver.com/maps/{}",
+    ]
+    seen_ids: list[str] = []
+    messages = []
+    for index in range(count):
+        if seen_ids and random.random() < repeat_ratio:
+            track_id = random.choice(seen_ids)
+        else:
+            track_id = f"{index:x}load{random.getrandbits(32):08x}"
+            seen_ids.append(track_id)
+        url = random.choice(url_templates).format(track_id)
+        messages.append(SyntheticMessage(f"have a listen {url} :)", channel_id=random.randrange(channels)))
+    return messages
+
+
+def percentiles(latencies: list[float]) -> dict[str, float | None]:
+    if len(latencies) < 2:
+        return {"p50": None, "p95": None, "p99": None}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+async def replay_messages(cog: HarnessConverter, messages: list[SyntheticMessage], *, rate: float) -> dict:
+    started_at = time.perf_counter()
+    for index, message in enumerate(messages):
+        if rate > 0 and (delay := started_at + index / rate - time.perf_counter()) > 0:
+            await asyncio.sleep(delay)
+        message.sent_at = time.perf_counter()
+        await cog.on_message(message)
+    await cog.auto_convert_queue.join()
+    duration = time.perf_counter() - started_at
+
+    latencies = [message.replied_at - message.sent_at for message in messages if message.replied_at is not None]
+    return {
+        "messages": len(messages),
+        "replied": len(latencies),
+        "dropped": cog.auto_convert_queue.dropped,
+        "duration": duration,
+        "throughput": len(latencies) / duration,
+        **percentiles(latencies),
+    }
+
+
+async def convert_playlist(cog: HarnessConverter) -> dict:
+    started_at = time.perf_counter()
+    converted_urls = await cog.convert_tracks(
+        "spotify",
+        "youtube",
+        cog.api_interfaces["spotify"].iter_playlist_tracks("loadtestplaylist"),
+    )
+    duration = time.perf_counter() - started_at
+    return {
+        "tracks": len(converted_urls),
+        "found": sum(1 for url in converted_urls if url),
+        "duration": duration,
+        "throughput": len(converted_urls) / duration,
+    }
+
+
+def format_seconds(seconds: float | None) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.1f}ms"
+
+
+async def run(args: argparse.Namespace) -> dict:
+    servers = StubServers(StubBehaviour(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        playlist_size=args.playlist_tracks,
+    ))
+    await servers.start()
+    results: dict = {}
+    with tempfile.TemporaryDirectory() as storage_path:
+        overrides = {
+            "active_platforms": ["spotify", "youtube", "youtube_music", "beatsaver", "invidious"],
+            "preferred_platform": "youtube",
+            "disliked_platforms": ["spotify", "beatsaver", "invidious"],
+            "auto_convert_dedup_window": 0,
+            "metrics_port": 0,
+            "metrics_file_interval": 0,
+            "slow_conversion_threshold": 0,
+            "spotify": {"client_id": "stub", "client_secret": "stub"},
+            "invidious": {"instances": [f"{servers.base_url}/invidious"]},
+        }
+        if args.unthrottled:
+            # A rate of 0 turns the token buckets off, to find the cog's own limits rather than the platforms'
+            for platform_name in overrides["active_platforms"]:
+                overrides.setdefault(platform_name, {})["requests_per_second"] = 0
+        settings = settings_from_schema(overrides)
+        cog = HarnessConverter(settings=settings, storage_path=Path(storage_path), stub_url=servers.base_url)
+        await cog.cog_load()
+        try:
+            messages = synthetic_messages(
+                args.messages,
+                stub_url=servers.base_url,
+                repeat_ratio=args.repeat_ratio,
+                channels=args.channels,
+            )
+            results["messages"] = await replay_messages(cog, messages, rate=args.rate)
+            if args.playlist_tracks:
+                results["playlist"] = await convert_playlist(cog)
+            results["stub_requests"] = dict(servers.requests)
+            results["stub_responses"] = {str(status): count for status, count in servers.responses.items()}
+            results["metrics"] = cog.metrics.summary()
+        finally:
+            await cog.cog_unload()
+            await servers.stop()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000, help="how many messages to replay")
+    parser.add_argument("--rate", type=float, default=50, help="messages sent per second, 0 for as fast as possible")
+    parser.add_argument("--repeat-ratio", type=float, default=0.2, help="share of messages linking an earlier track")
+    parser.add_argument("--channels", type=int, default=10, help="how many channels the messages are spread over")
+    parser.add_argument("--playlist-tracks", type=int, default=500, help="size of the converted playlist, 0 to skip")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds every stub response takes")
+    parser.add_argument("--jitter", type=float, default=0.02, help="up to how many seconds more a response takes")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of stub responses that fail")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of stub responses that are 429s")
+    parser.add_argument(
+        "--unthrottled",
+        action="store_true",
+        help="ignore the configured requests_per_second of every platform",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic messages and stub faults")
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    results = asyncio.run(run(args))
+
+    messages = results["messages"]
+    print(
+        f"Messages: {messages['replied']}/{messages['messages']} replied to, {messages['dropped']} dropped, "
+        f"in {messages['duration']:.1f}s ({messages['throughput']:.1f} messages/s)\n"
+        f"Latency: p50 {format_seconds(messages['p50'])}, p95 {format_seconds(messages['p95'])}, "
+        f"p99 {format_seconds(messages['p99'])}"
+    )
+    if playlist := results.get("playlist"):
+        print(
+            f"Playlist: {playlist['found']}/{playlist['tracks']} tracks converted in {playlist['duration']:.1f}s "
+            f"({playlist['throughput']:.1f} tracks/s)"
+        )
+    print(f"Stub requests: {results['stub_requests']}, responses: {results['stub_responses']}")
+    print(f"\n{results['metrics']}")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=4) + "\n", "utf-8")
+
+
+if __name__ == "__main__":
+    main()
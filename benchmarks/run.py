@@ -0,0 +1,175 @@
+"""Offline micro-benchmarks for the conversion hot paths.
+
+Everything runs on the recorded fixtures in ``fixtures/``, nothing touches the network.
+Results are compared against a stored baseline, and the run fails if any benchmark got slower than allowed:
+
+    python benchmarks/run.py                # compare against benchmarks/results/baseline.json
+    python benchmarks/run.py --save         # store this run as the new baseline
+"""
+import argparse
+import importlib
+import json
+import platform
+import sys
+import timeit
+import tomllib
+from collections.abc import Callable
+from pathlib import Path
+from types import SimpleNamespace
+
+MODULE_PATH = Path(__file__).resolve().parent.parent
+FIXTURES_PATH = Path(__file__).resolve().parent / "fixtures"
+DEFAULT_BASELINE_PATH = Path(__file__).resolve().parent / "results" / "baseline.json"
+
+# The module uses relative imports, so it has to be imported as a package from the folder it is in
+sys.path.insert(0, str(MODULE_PATH.parent))
+converter = importlib.import_module(MODULE_PATH.name)
+
+api = converter.api
+SpotifyAPI = api.platforms.SpotifyAPI
+YoutubeAPI = api.platforms.YoutubeAPI
+YoutubeMusicAPI = api.platforms.YoutubeMusicAPI
+BeatSaverAPI = api.platforms.BeatSaverAPI
+InvidiousAPI = api.platforms.InvidiousAPI
+
+
+def load_fixture(name: str):
+    with open(FIXTURES_PATH / name, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def build_benchmarks() -> dict[str, Callable[[], object]]:
+    spotify_track = load_fixture("spotify_track.json")
+    youtube_video = load_fixture("youtube_video_renderer.json")
+    invidious_video = load_fixture("invidious_video.json")
+    messages = [SimpleNamespace(content=content) for content in load_fixture("messages.json")]
+
+    api_interfaces = {
+        "spotify": SpotifyAPI(session=None, client_id="", client_secret=""),
+        "youtube": YoutubeAPI(session=None),
+        "youtube_music": YoutubeMusicAPI(session=None),
+        "beatsaver": BeatSaverAPI(session=None),
+        "invidious": InvidiousAPI(session=None),
+    }
+    # Just enough of the cog for message_track_routes to run against
+    cog = SimpleNamespace(
+        settings=SimpleNamespace(preferred_platform=SimpleNamespace(value="youtube")),
+        api_interfaces=api_interfaces,
+        url_router=api.routing.URLRouter(api_interfaces),
+    )
+
+    universal_track = api.platforms.spotify.spotify_track_to_universal(spotify_track)
+    playlist = api.universals.UniversalPlaylist(
+        name="Benchmark playlist",
+        description="A playlist with *plenty* of tracks, some of which need their markdown escaped",
+        owner_names=("Benchmark",),
+        url="https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M",
+        tracks=[
+            api.universals.UniversalTrack(
+                title=f"{universal_track.title} _{i}_",
+                artist_names=universal_track.artist_names,
+                url=universal_track.url,
+                cover_url=universal_track.cover_url,
+            )
+            for i in range(200)
+        ],
+    )
+
+    benchmarks: dict[str, Callable[[], object]] = {
+        "message_track_routes": lambda: [
+            converter.PlatformConverter.message_track_routes(cog, message) for message in messages
+        ],
+        "spotify_track_to_universal": lambda: api.platforms.spotify.spotify_track_to_universal(spotify_track),
+        "youtube_video_to_universal": lambda: api.platforms.youtube.youtube_video_to_universal(youtube_video),
+        "invidious_video_to_universal": lambda: api.platforms.individous.invidious_video_to_universal(
+            invidious_video,
+            instance_url="https://yt.artemislena.eu",
+        ),
+        "track_to_query": lambda: api.helpers.track_to_query(universal_track),
+        "playlist_description": lambda: api.helpers.playlist_description(playlist, max_tracks=100),
+        "track_embed": lambda: api.helpers.track_embed(universal_track, random_colour=True),
+    }
+
+    # Every platform's id extraction, on a url it accepts
+    track_urls = {
+        "spotify": "https://open.spotify.com/intl-de/track/0vFOzaXqZHahrZp6enQwQb?si=4f1c2d3e4b5a6978",
+        "youtube": "https://www.youtube.com/watch?v=-0kcet4aPpQ",
+        "youtube_music": "https://music.youtube.com/watch?v=-0kcet4aPpQ&feature=share",
+        "beatsaver": "https://beatsaver.com/maps/25f",
+        "invidious": "https://yt.artemislena.eu/watch?v=-0kcet4aPpQ",
+    }
+    playlist_urls = {
+        "spotify": "https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M",
+        "youtube": "https://www.youtube.com/playlist?list=PLFgquLnL59alCl_2TQvOiD5Vgm1hCaGSI",
+        "invidious": "https://yt.artemislena.eu/playlist?list=PLFgquLnL59alCl_2TQvOiD5Vgm1hCaGSI",
+    }
+    for platform_name, url in track_urls.items():
+        benchmarks[f"{platform_name}.get_track_id"] = lambda interface=api_interfaces[platform_name], url=url: (
+            interface.get_track_id(url)
+        )
+    for platform_name, url in playlist_urls.items():
+        benchmarks[f"{platform_name}.get_playlist_id"] = lambda interface=api_interfaces[platform_name], url=url: (
+            interface.get_playlist_id(url)
+        )
+    return benchmarks
+
+
+def measure(function: Callable[[], object], *, repeat: int) -> float:
+    """The fastest time a single call took over several runs, in seconds."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE_PATH, help="the results to compare against")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--repeat", type=int, default=5, help="how many times each benchmark is timed")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="how much slower than the baseline a benchmark may be before it counts as a regression, 0.25 is 25%%",
+    )
+    parser.add_argument("--filter", default="", help="only run benchmarks with this in their name")
+    args = parser.parse_args()
+
+    with open(MODULE_PATH / "manifest.toml", "rb") as file:
+        version = tomllib.load(file)["module"]["version"]
+    baseline = json.loads(args.baseline.read_text("utf-8")) if args.baseline.is_file() else None
+    baseline_results = baseline["results"] if baseline else {}
+
+    results: dict[str, float] = {}
+    regressions = []
+    for name, function in build_benchmarks().items():
+        if args.filter not in name:
+            continue
+        results[name] = seconds = measure(function, repeat=args.repeat)
+        line = f"{name:<36} {seconds * 1e6:>10.2f}µs"
+        if (previous := baseline_results.get(name)) is not None:
+            change = seconds / previous - 1
+            line += f" {change:>+8.1%}"
+            if change > args.tolerance:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+
+    if baseline:
+        print(f"\nCompared against version {baseline['version']} on Python {baseline['python']}")
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({
+            "version": version,
+            "python": platform.python_version(),
+            "results": results,
+        }, indent=4) + "\n", "utf-8")
+        print(f"Saved results to {args.baseline}")
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
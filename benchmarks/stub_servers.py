@@ -0,0 +1,271 @@
+"""Local stand-ins for the platform APIs, for load testing without touching the real services.
+
+Every platform is served from one aiohttp app under its own path prefix:
+``/spotify``, ``/youtube`` (innertube), ``/invidious`` and ``/beatsaver``.
+Responses are generated from the requested ids, so any id "exists", and every request can be delayed,
+failed or rate limited at random according to :class:`StubBehaviour`.
+"""
+import asyncio
+import dataclasses
+import hashlib
+import random
+from collections import Counter
+
+from aiohttp import web
+
+__all__ = [
+    "StubBehaviour",
+    "StubServers",
+]
+
+# How many items the paginated playlist endpoints return per page
+PAGE_SIZE = 100
+
+
+@dataclasses.dataclass(kw_only=True)
+class StubBehaviour:
+    # Seconds every response is delayed by, plus up to ``jitter`` more at random
+    latency: float = 0.05
+    jitter: float = 0.02
+    # The share of requests answered with ``error_status`` or with a 429, from 0 to 1
+    error_rate: float = 0.0
+    error_status: int = 503
+    rate_limit_rate: float = 0.0
+    retry_after: float = 1.0
+    # How many tracks every playlist has
+    playlist_size: int = 500
+
+
+def _name(seed: str, kind: str) -> str:
+    # Stable, so that the same id always describes the same track
+    return f"{kind} {hashlib.blake2s(seed.encode(), digest_size=4).hexdigest()}"
+
+
+def _spotify_track(track_id: str) -> dict:
+    return {
+        "id": track_id,
+        "name": _name(track_id, "Track"),
+        "type": "track",
+        "is_local": False,
+        "artists": [{"name": _name(track_id, "Artist")}],
+        "album": {
+            "album_type": "album",
+            "name": _name(track_id, "Album"),
+            "artists": [{"name": _name(track_id, "Artist")}],
+            "external_urls": {"spotify": f"https://open.spotify.com/album/{track_id}"},
+            "images": [{"url": f"https://i.scdn.co/image/{track_id}", "width": 640, "height": 640}],
+            "release_date": "2020-01-01",
+        },
+        "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"},
+    }
+
+
+def _youtube_video(video_id: str) -> dict:
+    return {
+        "videoId": video_id,
+        "title": {"runs": [{"text": _name(video_id, "Video")}]},
+        "ownerText": {"runs": [{"text": _name(video_id, "Channel")}]},
+        "thumbnail": {"thumbnails": [{"url": f"https://i.ytimg.com/vi/{video_id}/hq720.jpg", "width": 720, "height": 404}]},
+    }
+
+
+def _invidious_video(video_id: str, base_url: str) -> dict:
+    return {
+        "type": "video",
+        "videoId": video_id,
+        "title": _name(video_id, "Video"),
+        "author": _name(video_id, "Channel"),
+        "videoThumbnails": [{"quality": "high", "url": f"{base_url}/vi/{video_id}/hqdefault.jpg"}],
+    }
+
+
+def _beatsaver_map(map_id: str) -> dict:
+    return {
+        "id": map_id,
+        "metadata": {"songName": _name(map_id, "Song"), "songAuthorName": _name(map_id, "Artist")},
+        "versions": [{"coverURL": f"https://eu.cdn.beatsaver.com/{map_id}.jpg"}],
+    }
+
+
+def _search_ids(query: str, count: int = 5) -> list[str]:
+    return [hashlib.blake2s(f"{query}{i}".encode(), digest_size=6).hexdigest() for i in range(count)]
+
+
+class StubServers:
+    """Runs the stub platform APIs on a local port, counting the requests each path prefix gets."""
+
+    def __init__(self, behaviour: StubBehaviour | None = None, *, host: str = "127.0.0.1", port: int = 0):
+        self.behaviour = behaviour or StubBehaviour()
+        self.host = host
+        self.port = port
+        self.requests: Counter[str] = Counter()
+        self.responses: Counter[int] = Counter()
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        app = web.Application(middlewares=[self._faults])
+        app.add_routes([
+            web.post("/spotify/token", self._spotify_token),
+            web.get("/spotify/v1/tracks", self._spotify_tracks),
+            web.get("/spotify/v1/search", self._spotify_search),
+            web.get("/spotify/v1/playlists/{playlist_id}", self._spotify_playlist),
+            web.get("/spotify/v1/playlists/{playlist_id}/tracks", self._spotify_playlist_tracks),
+            web.post("/youtube/player", self._youtube_player),
+            web.post("/youtube/search", self._youtube_search),
+            web.post("/youtube/browse", self._youtube_browse),
+            web.get("/invidious/api/v1/videos/{video_id}", self._invidious_video),
+            web.get("/invidious/api/v1/search", self._invidious_search),
+            web.get("/invidious/api/v1/playlists/{playlist_id}", self._invidious_playlist),
+            web.get("/beatsaver/maps/id/{map_id}", self._beatsaver_map),
+            web.get("/beatsaver/search/text/0", self._beatsaver_search),
+        ])
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # The real port, in case port 0 let the OS pick one
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    @web.middleware
+    async def _faults(self, request: web.Request, handler) -> web.StreamResponse:
+        behaviour = self.behaviour
+        self.requests[request.path.split("/")[1]] += 1
+        await asyncio.sleep(behaviour.latency + random.random() * behaviour.jitter)
+
+        roll = random.random()
+        if roll < behaviour.rate_limit_rate:
+            response = web.json_response(
+                {"error": "rate limited"},
+                status=429,
+                headers={"Retry-After": str(behaviour.retry_after)},
+            )
+        elif roll < behaviour.rate_limit_rate + behaviour.error_rate:
+            response = web.json_response({"error": "stub failure"}, status=behaviour.error_status)
+        else:
+            response = await handler(request)
+        self.responses[response.status] += 1
+        return response
+
+    # Spotify
+
+    async def _spotify_token(self, _: web.Request) -> web.Response:
+        return web.json_response({"access_token": "stub-token", "token_type": "Bearer", "expires_in": 3600})
+
+    async def _spotify_tracks(self, request: web.Request) -> web.Response:
+        return web.json_response({"tracks": [_spotify_track(track_id) for track_id in request.query["ids"].split(",")]})
+
+    async def _spotify_search(self, request: web.Request) -> web.Response:
+        return web.json_response({"tracks": {"items": list(map(_spotify_track, _search_ids(request.query["q"])))}})
+
+    def _spotify_playlist_page(self, playlist_id: str, offset: int) -> dict:
+        size = self.behaviour.playlist_size
+        end = min(offset + PAGE_SIZE, size)
+        return {
+            "items": [
+                {"is_local": False, "track": _spotify_track(f"{playlist_id}{index:05}")}
+                for index in range(offset, end)
+            ],
+            "total": size,
+            "next": (
+                f"{self.base_url}/spotify/v1/playlists/{playlist_id}/tracks?offset={end}&limit={PAGE_SIZE}"
+                if end < size else None
+            ),
+        }
+
+    async def _spotify_playlist(self, request: web.Request) -> web.Response:
+        playlist_id = request.match_info["playlist_id"]
+        # Stub playlists never change, so their snapshot only depends on their size
+        snapshot_id = f"{playlist_id}-{self.behaviour.playlist_size}"
+        if request.query.get("fields") == "snapshot_id":
+            return web.json_response({"snapshot_id": snapshot_id})
+        return web.json_response({
+            "name": _name(playlist_id, "Playlist"),
+            "snapshot_id": snapshot_id,
+            "description": "",
+            "owner": {"display_name": _name(playlist_id, "User")},
+            "external_urls": {"spotify": f"https://open.spotify.com/playlist/{playlist_id}"},
+            "images": [{"url": f"https://i.scdn.co/image/{playlist_id}"}],
+            "tracks": self._spotify_playlist_page(playlist_id, 0),
+        })
+
+    async def _spotify_playlist_tracks(self, request: web.Request) -> web.Response:
+        offset = int(request.query.get("offset", 0))
+        return web.json_response(self._spotify_playlist_page(request.match_info["playlist_id"], offset))
+
+    # YouTube innertube
+
+    async def _youtube_player(self, request: web.Request) -> web.Response:
+        video = _youtube_video((await request.json())["videoId"])
+        return web.json_response({"videoDetails": {
+            "videoId": video["videoId"],
+            "title": video["title"]["runs"][0]["text"],
+            "author": video["ownerText"]["runs"][0]["text"],
+            "thumbnail": video["thumbnail"],
+        }})
+
+    async def _youtube_search(self, request: web.Request) -> web.Response:
+        videos = [{"videoRenderer": _youtube_video(video_id)} for video_id in _search_ids((await request.json())["query"])]
+        return web.json_response({"contents": {"sectionListRenderer": {"contents": [{"itemSectionRenderer": {
+            "contents": videos,
+        }}]}}})
+
+    async def _youtube_browse(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        if "continuation" in payload:
+            playlist_id, offset = payload["continuation"].rsplit(":", 1)
+            offset = int(offset)
+        else:
+            playlist_id, offset = payload["browseId"].removeprefix("VL"), 0
+
+        end = min(offset + PAGE_SIZE, self.behaviour.playlist_size)
+        items: list[dict] = [
+            {"playlistVideoRenderer": {**_youtube_video(f"{playlist_id}{index:05}"), "isPlayable": True}}
+            for index in range(offset, end)
+        ]
+        if end < self.behaviour.playlist_size:
+            items.append({"continuationItemRenderer": {
+                "continuationEndpoint": {"continuationCommand": {"token": f"{playlist_id}:{end}"}},
+            }})
+        response = {"contents": {"playlistVideoListRenderer": {"contents": items}}}
+        if not offset:
+            response["metadata"] = {"playlistMetadataRenderer": {"title": _name(playlist_id, "Playlist")}}
+        return web.json_response(response)
+
+    # Invidious
+
+    async def _invidious_video(self, request: web.Request) -> web.Response:
+        return web.json_response(_invidious_video(request.match_info["video_id"], f"{self.base_url}/invidious"))
+
+    async def _invidious_search(self, request: web.Request) -> web.Response:
+        base_url = f"{self.base_url}/invidious"
+        return web.json_response([_invidious_video(video_id, base_url) for video_id in _search_ids(request.query["q"])])
+
+    async def _invidious_playlist(self, request: web.Request) -> web.Response:
+        playlist_id = request.match_info["playlist_id"]
+        page = int(request.query.get("page", 1))
+        offset = (page - 1) * PAGE_SIZE
+        end = min(offset + PAGE_SIZE, self.behaviour.playlist_size)
+        return web.json_response({
+            "title": _name(playlist_id, "Playlist"),
+            "author": _name(playlist_id, "User"),
+            "videos": [
+                _invidious_video(f"{playlist_id}{index:05}", f"{self.base_url}/invidious")
+                for index in range(offset, end)
+            ],
+        })
+
+    # BeatSaver
+
+    async def _beatsaver_map(self, request: web.Request) -> web.Response:
+        return web.json_response(_beatsaver_map(request.match_info["map_id"]))
+
+    async def _beatsaver_search(self, request: web.Request) -> web.Response:
+        return web.json_response({"docs": list(map(_beatsaver_map, _search_ids(request.query["q"])))})